@@ -1,47 +1,247 @@
 import argparse
+import atexit
 import json
+import sys
+from os import environ
+from os.path import basename, splitext
 
-from PIL import Image
-from numpy import array
-
-from src import MFM, Model, ModelInput, View, Face
-from src.fitter import FittersChain
 from data import get_datafile_path
 
+BACKENDS = ['glut', 'egl', 'osmesa', 'cpu']
+PLATFORMS = ['egl', 'osmesa']
+SHAPES = ['gpu', 'cpu']
+READ_FORMATS = ['rgba32f', 'red32f', 'red16', 'red8']
+BASIS_FORMATS = ['float32', 'float16', 'int16']
+COMMANDS = ['fit', 'batch', 'serve', 'compile', 'quantization']
+
+SIZE = (500, 500)
+
 parser = argparse.ArgumentParser(
     description='Morphable Face Model fitting application')
 parser.add_argument(
-    '--config', metavar='config', type=str, required=True,
+    'command', metavar='command', type=str, nargs='?', choices=COMMANDS,
+    default='fit',
+    help='`fit` images one by one (default), `batch` fit them '
+         'by pool of processes, `serve` fitting jobs over HTTP, '
+         '`compile` the model to directory of arrays or report '
+         'vertex errors of basis `quantization`')
+parser.add_argument(
+    '--config', metavar='config', type=str,
     help='specify configuration file for fitting procedure')
+parser.add_argument(
+    '--model', metavar='model', type=str,
+    help='specify model file or directory compiled by `compile` command')
+parser.add_argument(
+    '--max-components', metavar='max_components', type=int,
+    help='specify number of principal components of the model to load')
+parser.add_argument(
+    '--inputs', metavar='inputs', type=str,
+    help='specify image, directory, glob pattern or manifest of images '
+         'to fit, overrides the input from configuration')
+parser.add_argument(
+    '--backend', metavar='backend', type=str, choices=BACKENDS,
+    help='specify rendering backend, overrides the one from configuration')
+parser.add_argument(
+    '--batch-size', metavar='batch_size', type=int,
+    help='specify maximal number of faces rendered in one frame')
+parser.add_argument(
+    '--shape', metavar='shape', type=str, choices=SHAPES,
+    help='specify where OpenGL backends calculate face vertices')
+parser.add_argument(
+    '--read-format', metavar='read_format', type=str, choices=READ_FORMATS,
+    help='specify pixel format OpenGL backends read rendered faces in')
+parser.add_argument(
+    '--basis-format', metavar='basis_format', type=str,
+    choices=BASIS_FORMATS,
+    help='specify format of principal components texture of OpenGL backends')
+parser.add_argument(
+    '--setup-cache', metavar='setup_cache', type=str,
+    help='specify directory to keep compiled shaders and basis texture in '
+         'for OpenGL backends starting faster next time')
+parser.add_argument(
+    '--preview', metavar='preview', type=int,
+    help='fit in GLUT window presenting only every preview-th frame')
+parser.add_argument(
+    '--render-processes', metavar='render_processes', type=int,
+    help='specify number of processes rendering each frame '
+         'with headless backend')
+parser.add_argument(
+    '--pipeline', action='store_true',
+    help='calculate costs of rendered faces while next ones are rendered')
+parser.add_argument(
+    '--cache-size', metavar='cache_size', type=int,
+    help='specify number of errors of rendered faces to keep in cache')
+parser.add_argument(
+    '--output', metavar='output', type=str,
+    help='specify path prefix to save fitted face image and parameters to')
+parser.add_argument(
+    '--snapshots', metavar='snapshots', type=int,
+    help='save image of every snapshots-th rendered frame with output prefix, '
+         'each snapshot is rendered once more')
+parser.add_argument(
+    '--port', metavar='port', type=int, default=8000,
+    help='specify local port to serve fitting jobs on')
+parser.add_argument(
+    '--profile-startup', action='store_true',
+    help='report import time of each module on exit')
+parser.add_argument(
+    '--processes', metavar='processes', type=int,
+    help='specify number of processes of batch fitting, one per core '
+         'by default')
 
 args = parser.parse_args()
 
+if args.profile_startup:
+    # Imports are measured from here on, modules are mostly imported lazily
+    from src.ImportProfiler import ImportProfiler
+    profiler = ImportProfiler()
+    profiler.install()
+    atexit.register(profiler.report)
+
+if args.command == 'compile':
+    if not args.output:
+        parser.error('compiling needs output directory')
+    from src import MFM
+    MFM.compile_model(args.model or MFM.DEFAULT_MODEL_PATH, args.output)
+    sys.exit()
+if args.command == 'quantization':
+    from src import MFM
+    from src.Quantization import get_vertex_errors
+    MFM.init(args.model, args.max_components)
+    for basis_format in BASIS_FORMATS[1:]:
+        errors = get_vertex_errors(MFM.get_array('basis'), basis_format)
+        print('{}: worst vertex error {:g} at vertex {}'.format(
+            basis_format, errors.max(), errors.argmax()))
+    sys.exit()
+if not args.config:
+    parser.error('the following arguments are required: --config')
+if args.snapshots is not None and args.snapshots < 1:
+    parser.error('snapshots period should be positive')
+
 fitting_settings = None
 with open(args.config) as config:
     fitting_settings = json.load(config)
 
+view_settings = fitting_settings.get('view', {})
+backend = args.backend or view_settings.get('backend', 'glut')
+batch_size = args.batch_size or view_settings.get('batch_size', 1)
+shape = args.shape or view_settings.get('shape', 'gpu')
+read_format = args.read_format or view_settings.get('read_format', 'rgba32f')
+basis_format = (args.basis_format
+                or view_settings.get('basis_format', 'float32'))
+setup_cache = args.setup_cache or view_settings.get('setup_cache')
+preview = view_settings.get('preview')
+if args.preview is not None:
+    preview = args.preview
+pipeline = args.pipeline or view_settings.get('pipeline', False)
+cache_size = args.cache_size or view_settings.get('cache_size', 0)
+render_processes = (args.render_processes
+                    or view_settings.get('render_processes', 1))
+view_options = {
+    'backend': backend,
+    'batch_size': batch_size,
+    'shape': shape,
+    'read_format': read_format,
+    'basis_format': basis_format,
+    'setup_cache': setup_cache,
+    'preview': preview,
+    'pipeline': pipeline,
+    'cache_size': cache_size,
+    'render_processes': render_processes,
+    'model': args.model or fitting_settings.get('model'),
+    'max_components': (args.max_components
+                       or fitting_settings.get('max_components'))
+}
+if args.command == 'batch' and (backend == 'glut' or not args.output):
+    parser.error('batch fitting needs headless backend and output file')
+if args.command == 'serve' and backend == 'glut':
+    parser.error('serving needs headless backend')
+if render_processes > 1 and backend == 'glut':
+    parser.error('render processes need headless backend')
+if backend in PLATFORMS:
+    # PyOpenGL platform can be chosen only before the first import of OpenGL
+    environ['PYOPENGL_PLATFORM'] = backend
+
+from src import MFM, Model  # noqa: E402
+from src.InputLoader import InputLoader, get_input_paths  # noqa: E402
+from src.fitter import FittersChain  # noqa: E402
+
+from src.Batch import fit_batch, get_initial_face, create_view  # noqa: E402
+
 fitters = fitting_settings['fitters']
+initial_face = get_initial_face(fitting_settings)
+
+if args.command == 'serve':
+    from src.FitServer import FitServer
+
+    # Model and viewport are initialized once for all jobs
+    MFM.init(view_options['model'], view_options['max_components'])
+    model = Model(create_view(SIZE, view_options), pipeline, cache_size)
+    server = FitServer(model, SIZE, fitters, initial_face,
+                       ('127.0.0.1', args.port))
+    server.serve_forever()
+    sys.exit()
+
+# Input is an image, a directory, a glob pattern, a manifest or a list of them
+input_images = args.inputs or fitting_settings['input']['input_image']
+if not isinstance(input_images, list):
+    input_images = [input_images]
+input_paths = [path
+               for input_image in input_images
+               for path in get_input_paths(get_datafile_path(input_image))]
+
+if args.command == 'batch':
+    # Results of every image are written to JSON lines or NumPy file
+    fit_batch(fitting_settings, input_paths, args.output, SIZE,
+              view_options, args.processes)
+    sys.exit()
+
+inputs = InputLoader(input_paths)
+
+MFM.init(view_options['model'], view_options['max_components'])
+view = create_view(SIZE, view_options)
+model = Model(view, pipeline, cache_size)
+if not view.headless:
+    from src import ModelInput
+    model_input = ModelInput(model)
+
+
+def get_output(path):
+    """Get output prefix for the input image."""
+    if len(input_paths) == 1:
+        return args.output
+    return '{}.{}'.format(args.output, splitext(basename(path))[0])
+
+
+def save_result(path, face):
+    """Render fitted Face and save it to output files."""
+    model.face = face
+    model.request_image(
+        face, lambda image: model.save_image(get_output(path), image))
+
+
+def fit_next():
+    """Start fitting of the next input image.
 
-face_parameters = fitting_settings['input'].get('initial_face', {})
+    Provides `None` when all input images are fitted.
+    """
+    try:
+        path, image_data = next(inputs)
+    except StopIteration:
+        return None
 
-coefficients = face_parameters.get('coefficients', [])
-directed_light = face_parameters.get('directed_light', (0., 0., 0.))
-ambient_light = face_parameters.get('ambient_light', 0.)
-initial_face = Face(coefficients=coefficients,
-                    directed_light=directed_light,
-                    ambient_light=ambient_light)
+    def finish(face):
+        if args.output:
+            save_result(path, face)
+        next_chain = fit_next()
+        if next_chain is not None:
+            next_chain.start()
 
-model_filename = get_datafile_path(fitting_settings['input']['input_image'])
-image = Image.open(model_filename).convert('L')
-original_data = array(image.getdata()).astype('f') / 255
-image_data = original_data.reshape(image.size)[::-1, :].flatten()
-image.close()
+    return FittersChain(fitters, image_data, model,
+                        initial_face=initial_face, callback=finish)
 
-MFM.init()
-view = View((500, 500))
-model = Model(view)
-model_input = ModelInput(model)
 
-chain = FittersChain(fitters, image_data, model, initial_face=initial_face)
+if args.output and args.snapshots:
+    model.save_snapshots(args.output, args.snapshots)
 
-model.start(chain)
+model.start(fit_next(), optimize=view.headless)
@@ -1,4 +1,4 @@
-#version 300 es
+#version 420
 
 void main(void) {
 }
@@ -1,22 +1,13 @@
-#version 300 es
+#version 420
 
-in vec3 mean_position;
+layout(location = 0) in vec3 position;
 
-uniform mat4 light_matrix;
-
-uniform float coefficients[199];
-uniform int indices[199];
-uniform sampler2D principal_components;
+layout(std140, binding = 0) uniform Frame {
+    mat4 light_matrix;
+    mat4 rotation_matrix;
+    vec4 light_vector;
+};
 
 void main(void) {
-    int c_pos, i, j;
-    ivec2 texPos;
-    vec4 acc = vec4(0.0);
-    for (i = 0; i < 199 && indices[i] > -1; i++) {
-        j = indices[i];
-        c_pos = gl_VertexID + 53490 * j;
-        texPos = ivec2(c_pos % 8192, c_pos / 8192);
-        acc += texelFetch(principal_components, texPos, 0) * coefficients[j];
-    }
-    gl_Position = light_matrix * vec4(mean_position + vec3(acc), 246006.0);
+    gl_Position = light_matrix * vec4(position, 246006.0);
 }
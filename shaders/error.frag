@@ -0,0 +1,26 @@
+#version 420
+
+precision mediump float;
+
+in vec4 vertex_position;
+in float shadow;
+
+layout(location = 0) out vec2 fragment_error;
+layout(std140, binding = 0) uniform Frame {
+    mat4 light_matrix;
+    mat4 rotation_matrix;
+    vec4 light_vector;
+};
+layout(binding=2) uniform sampler2D target;
+
+void main(void) {
+    vec3 normal_vector = normalize(
+        cross(dFdx(vertex_position).xyz, dFdy(vertex_position).xyz));
+    float color = max(dot(light_vector.xyz, normal_vector), 0.0);
+    color *= max(shadow, light_vector.a);
+    color = round(clamp(color, 0.0, 1.0) * 255.0) / 255.0;
+
+    ivec2 pixel = ivec2(gl_FragCoord.xy) % textureSize(target, 0);
+    float difference = color - texelFetch(target, pixel, 0).r;
+    fragment_error = vec2(difference * difference, 1.0);
+}
@@ -6,7 +6,11 @@ in vec4 vertex_position;
 in float shadow;
 
 layout(location = 0) out vec4 fragment_color;
-uniform vec4 light_vector;
+layout(std140, binding = 0) uniform Frame {
+    mat4 light_matrix;
+    mat4 rotation_matrix;
+    vec4 light_vector;
+};
 
 void main(void) {
     vec3 normal_vector = normalize(
@@ -0,0 +1,27 @@
+#version 420
+
+layout(location = 0) in vec3 base_position;
+
+out vec3 position;
+
+// COMPONENTS, VERTICES and TEXTURE_COLUMNS are defined by View,
+// coefficients are scaled by it for components of normalized texture
+layout(std140, binding = 1) uniform Shape {
+    ivec4 indices[(COMPONENTS + 3) / 4];
+    vec4 coefficients[(COMPONENTS + 3) / 4];
+};
+layout(binding=0) uniform sampler2D principal_components;
+
+void main(void) {
+    int c_pos, i, j;
+    ivec2 texPos;
+    vec4 acc = vec4(0.0);
+    for (i = 0; i < COMPONENTS && indices[i / 4][i % 4] > -1; i++) {
+        j = indices[i / 4][i % 4];
+        c_pos = gl_VertexID + VERTICES * j;
+        texPos = ivec2(c_pos % TEXTURE_COLUMNS, c_pos / TEXTURE_COLUMNS);
+        acc += texelFetch(principal_components, texPos, 0)
+            * coefficients[j / 4][j % 4];
+    }
+    position = base_position + vec3(acc);
+}
@@ -0,0 +1,139 @@
+"""Fitting of many images by pool of processes.
+
+Each process loads the model and creates the viewport once
+and fits images one by one. Should be imported after PyOpenGL platform
+is chosen, processes inherit it.
+"""
+import json
+from multiprocessing import Pool
+from time import time
+
+from numpy import array, savez
+
+from . import MFM
+from .CPUView import CPUView
+from .Face import Face
+from .InputLoader import load_image
+from .Model import Model
+from .fitter import FittersChain
+
+ERROR_TEXT = {
+    'BACKEND': "Batch fitting needs headless backend, `{}` given"
+}
+
+# Viewport state of the process
+__process = {}
+
+
+def get_initial_face(fitting_settings):
+    """Get initial Face from `input` section of configuration."""
+    input_settings = fitting_settings.get('input', {})
+    return parse_face(input_settings.get('initial_face', {}))
+
+
+def parse_face(face_parameters):
+    """Get Face from its parameters in configuration."""
+    return Face(
+        coefficients=face_parameters.get('coefficients', []),
+        directed_light=face_parameters.get('directed_light', (0., 0., 0.)),
+        ambient_light=face_parameters.get('ambient_light', 0.))
+
+
+def create_view(size, options):
+    """Create viewport by options of `view` configuration section.
+
+    Several `render_processes` make pool of processes rendering frames.
+    OpenGL is imported only when OpenGL viewport is created.
+    """
+    if options.get('render_processes', 1) > 1:
+        from .RenderPool import RenderPool
+        return RenderPool(size, options['render_processes'], options)
+    if options['backend'] == 'cpu':
+        return CPUView(size, options['batch_size'])
+    from .View import View
+    return View(size, options['backend'], options['batch_size'],
+                options['shape'], options['read_format'],
+                options.get('preview'),
+                options.get('basis_format', 'float32'),
+                options.get('setup_cache'))
+
+
+def init_process(fitting_settings, size, options):
+    """Load the model and create the viewport of the process."""
+    MFM.init(options.get('model'), options.get('max_components'))
+    view = create_view(size, options)
+    __process['model'] = Model(view, options.get('pipeline', False),
+                               options.get('cache_size', 0))
+    __process['fitters'] = fitting_settings['fitters']
+    __process['initial_face'] = get_initial_face(fitting_settings)
+
+
+def fit_target(model, target, fitters, initial_face):
+    """Fit the target image by the chain of fitters.
+
+    Provides dictionary of fitted Face parameters, its error
+    and covered pixels count, number of rendered Faces
+    and fitting time in seconds. Model should have headless viewport,
+    its requests are dropped if fitting fails.
+    """
+    start = time()
+    rendered_faces = model.rendered_faces
+    result = {}
+
+    def receive_error(error):
+        result['error'] = float(error[0])
+        result['covered'] = int(error[1])
+
+    def finish(face):
+        result['face'] = face.as_array.tolist()
+        model.request_error(face, target, receive_error)
+
+    chain = FittersChain(fitters, target, model, initial_face=initial_face,
+                         callback=finish)
+    try:
+        model.start(chain, optimize=True)
+    finally:
+        model.reset()
+    result['renders'] = model.rendered_faces - rendered_faces
+    result['time'] = time() - start
+    return result
+
+
+def fit_image(path):
+    """Fit the image by the model of the process.
+
+    Provides results of `fit_target` with the input path.
+    """
+    result = fit_target(__process['model'], load_image(path),
+                        __process['fitters'], __process['initial_face'])
+    result['input'] = path
+    return result
+
+
+def fit_batch(fitting_settings, paths, output, size, options, processes=None):
+    """Fit images by pool of processes and write results to output.
+
+    Results are written to JSON lines file as soon as they are ready,
+    or to NumPy `.npz` file with arrays of all results at the end.
+    """
+    if options['backend'] == 'glut':
+        raise ValueError(ERROR_TEXT['BACKEND'].format(options['backend']))
+
+    pool = Pool(processes, init_process, (fitting_settings, size, options))
+    results = pool.imap_unordered(fit_image, paths)
+    if output.endswith('.npz'):
+        results = list(results)
+        savez(output,
+              input=array([result['input'] for result in results]),
+              face=array([result['face'] for result in results]),
+              error=array([result['error'] for result in results]),
+              covered=array([result['covered'] for result in results]),
+              renders=array([result['renders'] for result in results]),
+              time=array([result['time'] for result in results]))
+    else:
+        with open(output, 'w') as lines:
+            for result in results:
+                lines.write(json.dumps(result) + '\n')
+                lines.flush()
+    pool.close()
+    pool.join()
@@ -0,0 +1,36 @@
+"""Pool of arrays reused instead of being allocated for each image."""
+from numpy import empty
+
+
+class BufferPool:
+    """Preallocated arrays of the same shape and type.
+
+    Array is leased by `lease` and should be returned by `release`
+    when it's not used anymore, so that next lease gets it again
+    instead of allocating memory. Pool grows when all arrays are leased.
+    """
+
+    def __init__(self, shape, dtype='f', count=0):
+        """Preallocate given count of arrays."""
+        self.__shape = tuple(shape)
+        self.__dtype = dtype
+        self.__free = [empty(self.__shape, dtype=dtype)
+                       for _ in range(count)]
+        self.__allocated = count
+
+    @property
+    def allocated(self):
+        """Get number of arrays allocated by the pool."""
+        return self.__allocated
+
+    def lease(self):
+        """Get free array, its content is undefined."""
+        if len(self.__free) > 0:
+            return self.__free.pop()
+        self.__allocated += 1
+        return empty(self.__shape, dtype=self.__dtype)
+
+    def release(self, buffer):
+        """Return leased array to the pool."""
+        assert buffer.shape == self.__shape
+        self.__free.append(buffer)
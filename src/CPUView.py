@@ -0,0 +1,407 @@
+"""Viewport rendering Faces on CPU with NumPy."""
+from collections import deque
+
+from numpy import zeros, ones, full, arange, repeat, cumsum, searchsorted
+from numpy import floor, ceil, roll, lexsort, unique, concatenate
+from numpy import maximum, minimum, where, around, asarray, nan
+from numpy.linalg import norm
+
+from . import MFM
+from .BufferPool import BufferPool
+from .Camera import get_rotation_matrix
+from .IncrementalShape import IncrementalShape
+from .RenderLoop import RenderLoop
+
+# Homogeneous coordinate of vertices used by shaders to scale the model
+MODEL_SCALE = 246006.0
+
+SHADOW_OFFSETS = ((-1, -1), (-1, 1), (1, -1), (1, 1), (0, 0))
+POLYGON_OFFSET_FACTOR = 3.
+
+FRAGMENTS_CHUNK = 2**22
+
+
+class CPUView:
+    """Viewport for Faces rendered by NumPy without OpenGL.
+
+    Reproduces the image of `View` shaders: Face shape provided by
+    the shape engine, shadow map from directed light point of view
+    and Lambert shading of flat triangles.
+    """
+
+    headless = True
+
+    __triangles = None
+    __get_vertices = None
+    __update_vertices = None
+
+    def __init__(self, size, batch_size=1):
+        """Initialize viewport of given size.
+
+        Up to `batch_size` Faces can be rendered in one frame.
+        """
+        self.__size = size
+        self.__width, self.__height = size
+        self.__batch_size = batch_size
+        self.__output_images = zeros(
+            (batch_size, self.__width * self.__height * 4), dtype='f')
+
+        self.__light = None
+        self.__faces = []
+        self.__callback = None
+
+        self.__vertices = None
+        self.__shape_updates = IncrementalShape()
+        self.__reads = deque()
+        self.__images = BufferPool((self.__width * self.__height, 4), 'f',
+                                   2 * batch_size)
+        self.__target = None
+
+        self.__loop = RenderLoop(self.__display)
+
+    def get_size(self):
+        """Get size of the viewport."""
+        return self.__size
+
+    @property
+    def light(self):
+        """Get light direction."""
+        return self.__light
+
+    @light.setter
+    def light(self, light):
+        """Set light direction."""
+        self.__light = light
+
+    @property
+    def batch_size(self):
+        """Get maximal number of Faces rendered in one frame."""
+        return self.__batch_size
+
+    @property
+    def face(self):
+        """Get current Face."""
+        return self.__faces[0] if len(self.__faces) > 0 else None
+
+    @face.setter
+    def face(self, face):
+        """Set current Face."""
+        self.__faces = [face]
+
+    @property
+    def faces(self):
+        """Get Faces rendered in one frame."""
+        return self.__faces
+
+    @faces.setter
+    def faces(self, faces):
+        """Set Faces to be rendered in one frame."""
+        assert 0 < len(faces) <= self.__batch_size
+        self.__faces = list(faces)
+
+    @property
+    def target(self):
+        """Get image errors of rendered Faces are calculated against."""
+        return self.__target
+
+    @target.setter
+    def target(self, target):
+        """Set image to calculate errors of rendered Faces against."""
+        self.__target = target
+
+    def redraw(self, callback=None):
+        """Request render and trigger callback after it."""
+        self.__callback = callback
+        self.__loop.post_redisplay()
+
+    def get_image(self):
+        """Get RGBA data of the viewport as NumPy array of float."""
+        return self.__output_images[0]
+
+    def get_images(self):
+        """Get RGBA data of all rendered Faces.
+
+        Arrays of shape `(pixels, 4)` are provided in order of Faces.
+        """
+        return [image.reshape(-1, 4)
+                for image in self.__output_images[:len(self.__faces)]]
+
+    def read_images(self):
+        """Keep copies of images of rendered Faces.
+
+        Images are provided by `get_read_images` in order of reading
+        and can be returned for reuse by `release_images`, like `View` does.
+        """
+        images = []
+        for image in self.get_images():
+            buffer = self.__images.lease()
+            buffer[:] = image
+            images.append(buffer)
+        self.__reads.append(images)
+
+    def get_read_images(self):
+        """Get images of the earliest reading done by `read_images`."""
+        return self.__reads.popleft()
+
+    def release_images(self, images):
+        """Return images got from the viewport for reuse."""
+        for image in images:
+            self.__images.release(image)
+
+    def get_errors(self):
+        """Get errors of rendered Faces against the target.
+
+        Error is mean squared difference of red channel and the target
+        over covered pixels, provided as `(error, covered_pixels_count)`
+        for each Face like `View` does.
+        """
+        target = asarray(self.__target, dtype='f')
+        errors = []
+        for image in self.get_images():
+            covered = image[:, 3] != 0
+            count = int(covered.sum())
+            difference = image[covered, 0] - target[covered]
+            errors.append(((difference ** 2).mean() if count > 0 else nan,
+                           count))
+        return errors
+
+    def main_loop(self):
+        """Render requested Faces until there is nothing left."""
+        self.__loop.main_loop()
+
+    def close(self):
+        """Stop rendering."""
+        self.__loop.leave_main_loop()
+
+    @staticmethod
+    def set_triangles(triangles):
+        """Set triangles of the model."""
+        CPUView.__triangles = triangles.reshape(-1, 3)
+
+    @staticmethod
+    def set_shape_engine(get_vertices, update_vertices):
+        """Set functions calculating vertices of Faces.
+
+        `get_vertices` calculates array of shape `(N, V, 3)` for the list
+        of coefficients arrays, `update_vertices` adds changes of
+        coefficients with given indices to vertices in place.
+        """
+        CPUView.__get_vertices = staticmethod(get_vertices)
+        CPUView.__update_vertices = staticmethod(update_vertices)
+
+    def __display(self):
+        """Render current Face and trigger callback."""
+        self.render()
+        if self.__callback is not None:
+            self.__callback()
+
+    def render(self, faces=None):
+        """Render current Faces to the output images.
+
+        Given Faces replace current ones.
+        """
+        if faces is not None:
+            self.faces = faces
+        updates = self.__shape_updates.get_updates(
+            [face.coefficients for face in self.__faces])
+        changed = [tile for tile, update in enumerate(updates)
+                   if update is not None and update[0] is None]
+        shapes = {}
+        if len(changed) > 0:
+            shapes = dict(zip(changed, CPUView.__get_vertices(
+                [updates[tile][1] for tile in changed])))
+
+        for tile, face in enumerate(self.__faces):
+            if tile in shapes:
+                self.__vertices = shapes[tile]
+            elif updates[tile] is not None:
+                CPUView.__update_vertices(self.__vertices, *updates[tile])
+            self.__render_face(face, self.__vertices,
+                               self.__output_images[tile])
+
+    def __render_face(self, face, vertices, image):
+        """Render the Face with given vertices to the image."""
+        vertices = concatenate(
+            (vertices, full((vertices.shape[0], 1), MODEL_SCALE)), axis=1)
+
+        rotation_matrix = get_rotation_matrix(
+            face.position_cartesian, (1 + face.position[2]) * 0.5).T
+        light = face.directed_light_cartesian
+        light_matrix = get_rotation_matrix(
+            (light[0], light[1], -light[2]), 2.0).T
+        # Shaders get product of matrices in OpenGL layout
+        light_matrix = rotation_matrix.dot(light_matrix)
+
+        light_projection = vertices.dot(light_matrix.T)
+        depth_map, _, _ = self.__draw(self.__to_window(light_projection),
+                                      cull=False)
+        shadows = self.__get_shadows(light_projection, depth_map)
+
+        window = self.__to_window(vertices.dot(rotation_matrix.T))
+        _, triangles, barycentric = self.__draw(window, cull=True)
+        self.__shade(image.reshape(-1, 4), window, triangles, barycentric,
+                     shadows, face.light_cartesian)
+
+    def __to_window(self, positions):
+        """Convert clip coordinates to window coordinates."""
+        coordinates = positions[:, :3] / positions[:, 3:]
+        coordinates[:, 0] = (coordinates[:, 0] + 1) * self.__width * .5
+        coordinates[:, 1] = (coordinates[:, 1] + 1) * self.__height * .5
+        coordinates[:, 2] = (coordinates[:, 2] + 1) * .5
+        return coordinates
+
+    def __get_shadows(self, light_projection, depth_map):
+        """Get shadow value for each vertex like vertex shader does."""
+        coordinates = self.__to_window(light_projection)
+        x = floor(coordinates[:, 0]).astype('i')
+        y = floor(coordinates[:, 1]).astype('i')
+        reference = minimum(maximum(coordinates[:, 2], 0.), 1.)
+
+        depth_map = depth_map.reshape(self.__height, self.__width)
+        shadows = zeros(coordinates.shape[0])
+        for dx, dy in SHADOW_OFFSETS:
+            stored = depth_map[(y + dy) % self.__height,
+                               (x + dx) % self.__width]
+            shadows += reference < stored
+        return where(shadows < 3., shadows / 5., 1.)
+
+    def __setup_triangles(self, window, cull):
+        """Get triangles to draw and their edge functions coefficients.
+
+        Edge functions give barycentric coordinates of a point:
+        `A * x + B * y + C`.
+        """
+        triangles = CPUView.__triangles
+        x = window[triangles, 0]
+        y = window[triangles, 1]
+        area = ((x[:, 1] - x[:, 0]) * (y[:, 2] - y[:, 0])
+                - (x[:, 2] - x[:, 0]) * (y[:, 1] - y[:, 0]))
+
+        # Counter-clockwise triangles are front faces culled by View
+        visible = area < 0 if cull else area != 0
+        indices = visible.nonzero()[0]
+        x, y, area = x[indices], y[indices], area[indices, None]
+
+        x_next, y_next = roll(x, -1, axis=1), roll(y, -1, axis=1)
+        x_last, y_last = roll(x, -2, axis=1), roll(y, -2, axis=1)
+        a = (y_next - y_last) / area
+        b = (x_last - x_next) / area
+        c = (x_next * y_last - x_last * y_next) / area
+        return indices, x, y, a, b, c
+
+    def __rasterize(self, x, y, a, b, c):
+        """Generate fragments of triangles by chunks.
+
+        Yields indices of triangles, pixels they cover
+        and barycentric coordinates of pixels' centers.
+        """
+        x_min = maximum(ceil(x.min(axis=1) - .5), 0).astype('i')
+        x_max = minimum(floor(x.max(axis=1) - .5), self.__width - 1)
+        y_min = maximum(ceil(y.min(axis=1) - .5), 0).astype('i')
+        y_max = minimum(floor(y.max(axis=1) - .5), self.__height - 1)
+        widths = maximum(x_max - x_min + 1, 0).astype('i')
+        heights = maximum(y_max - y_min + 1, 0).astype('i')
+        counts = widths * heights
+        ends = cumsum(counts)
+
+        start = 0
+        while start < counts.size:
+            limit = (ends[start - 1] if start > 0 else 0) + FRAGMENTS_CHUNK
+            stop = max(searchsorted(ends, limit, side='right'), start + 1)
+            chunk_counts = counts[start:stop]
+            total = chunk_counts.sum()
+            if total > 0:
+                ids = repeat(arange(start, stop), chunk_counts)
+                offsets = arange(total) - repeat(
+                    cumsum(chunk_counts) - chunk_counts, chunk_counts)
+                px = x_min[ids] + offsets % widths[ids]
+                py = y_min[ids] + offsets // widths[ids]
+
+                barycentric = (a[ids] * (px[:, None] + .5)
+                               + b[ids] * (py[:, None] + .5) + c[ids])
+                inside = (barycentric >= 0).all(axis=1)
+                yield (ids[inside], py[inside] * self.__width + px[inside],
+                       barycentric[inside])
+            start = stop
+
+    def __draw(self, window, cull):
+        """Draw triangles with depth test.
+
+        Returns depth buffer, and for each pixel index of visible triangle
+        (`-1` if there is none) with barycentric coordinates.
+        """
+        size = self.__width * self.__height
+        depth_buffer = ones(size)
+        triangles_buffer = -ones(size, dtype='i')
+        barycentric_buffer = zeros((size, 3))
+
+        indices, x, y, a, b, c = self.__setup_triangles(window, cull)
+        z = window[CPUView.__triangles[indices], 2]
+        depth_offsets = POLYGON_OFFSET_FACTOR * maximum(
+            abs((a * z).sum(axis=1)), abs((b * z).sum(axis=1)))
+
+        for ids, pixels, barycentric in self.__rasterize(x, y, a, b, c):
+            depth = (barycentric * z[ids]).sum(axis=1)
+            unclipped = (depth >= 0) & (depth <= 1)
+            ids, pixels = ids[unclipped], pixels[unclipped]
+            barycentric = barycentric[unclipped]
+            depth = depth[unclipped] + depth_offsets[ids]
+
+            order = lexsort((depth, pixels))
+            _, nearest = unique(pixels[order], return_index=True)
+            nearest = order[nearest]
+            ids, pixels = ids[nearest], pixels[nearest]
+            barycentric, depth = barycentric[nearest], depth[nearest]
+
+            closer = depth < depth_buffer[pixels]
+            pixels = pixels[closer]
+            depth_buffer[pixels] = depth[closer]
+            triangles_buffer[pixels] = indices[ids[closer]]
+            barycentric_buffer[pixels] = barycentric[closer]
+
+        return depth_buffer, triangles_buffer, barycentric_buffer
+
+    def __get_normals(self, window, triangles):
+        """Get normals of triangles like fragment shader does.
+
+        Normal is cross product of screen space derivatives
+        of position in clip coordinates.
+        """
+        indices, inverse = unique(triangles, return_inverse=True)
+        vertices = window[CPUView.__triangles[indices]]
+        first = vertices[:, 1] - vertices[:, 0]
+        second = vertices[:, 2] - vertices[:, 0]
+        determinant = first[:, 0] * second[:, 1] - second[:, 0] * first[:, 1]
+        dz_dx = 2. * (first[:, 2] * second[:, 1]
+                      - second[:, 2] * first[:, 1]) / determinant
+        dz_dy = 2. * (first[:, 0] * second[:, 2]
+                      - second[:, 0] * first[:, 2]) / determinant
+
+        dx = 2. / self.__width
+        dy = 2. / self.__height
+        normals = zeros((indices.size, 3))
+        normals[:, 0] = - dy * dz_dx
+        normals[:, 1] = - dx * dz_dy
+        normals[:, 2] = dx * dy
+        normals /= norm(normals, axis=1)[:, None]
+        return normals[inverse]
+
+    def __shade(self, image, window, triangles, barycentric, shadows, light):
+        """Calculate colors of pixels to the image."""
+        image[:] = (1., 1., 1., 0.)
+
+        covered = (triangles >= 0).nonzero()[0]
+        triangles = triangles[covered]
+        color = maximum(self.__get_normals(window, triangles)
+                        .dot(light[:3]), 0.)
+        shadow = (barycentric[covered]
+                  * shadows[CPUView.__triangles[triangles]]).sum(axis=1)
+        color *= maximum(shadow, light[3])
+
+        # Viewport stores colors with 8 bits per channel
+        image[covered, :3] = around(
+            minimum(maximum(color, 0.), 1.) * 255)[:, None] / 255
+        image[covered, 3] = 1.
+
+
+MFM.register_view(CPUView)
@@ -0,0 +1,44 @@
+"""Camera matrices calculated without OpenGL fixed function pipeline.
+
+Matrices are returned in OpenGL (column-major) layout,
+the same `glGetFloatv(GL_MODELVIEW_MATRIX)` provides.
+"""
+from numpy import array, cross, eye
+from numpy.linalg import norm
+
+
+def ortho(left, right, bottom, top, near, far):
+    """Get orthographic projection matrix like `glOrtho` does."""
+    return array([
+        [2. / (right - left), 0., 0., - (right + left) / (right - left)],
+        [0., 2. / (top - bottom), 0., - (top + bottom) / (top - bottom)],
+        [0., 0., - 2. / (far - near), - (far + near) / (far - near)],
+        [0., 0., 0., 1.]
+    ])
+
+
+def look_at(position, target, up):
+    """Get viewing matrix like `gluLookAt` does."""
+    position = array(position, dtype='d')
+    forward = array(target, dtype='d') - position
+    forward /= norm(forward)
+    side = cross(forward, up)
+    side /= norm(side)
+    up = cross(side, forward)
+
+    rotation = eye(4)
+    rotation[0, :3] = side
+    rotation[1, :3] = up
+    rotation[2, :3] = - forward
+    translation = eye(4)
+    translation[:3, 3] = - position
+    return rotation.dot(translation)
+
+
+def get_rotation_matrix(coordinates, side_length):
+    """Get rotation matrix from specific point of view and scale."""
+    assert len(coordinates) == 3
+    projection = ortho(-side_length, side_length, -side_length, side_length,
+                       -4 * side_length, 4 * side_length)
+    view = look_at(coordinates, (0., 0., 0.), (0., 1., 0.))
+    return projection.dot(view).transpose().astype('f')
@@ -0,0 +1,302 @@
+"""OpenGL contexts to render Faces in.
+
+Windowless contexts need PyOpenGL platform to be selected before
+the first import of `OpenGL.GL` through `PYOPENGL_PLATFORM`
+environment variable (`egl` or `osmesa`).
+"""
+import sys
+from ctypes import pointer
+
+from OpenGL.GL import GL_FRAMEBUFFER, GL_RENDERBUFFER, GL_FRONT
+from OpenGL.GL import GL_COLOR_ATTACHMENT0, GL_DEPTH_STENCIL_ATTACHMENT
+from OpenGL.GL import GL_RGBA8, GL_DEPTH24_STENCIL8, GL_UNSIGNED_BYTE
+from OpenGL.GL import GL_FRAMEBUFFER_COMPLETE
+
+from OpenGL.GL import glGenFramebuffers, glBindFramebuffer, glViewport
+from OpenGL.GL import glGenRenderbuffers, glBindRenderbuffer
+from OpenGL.GL import glRenderbufferStorage, glFramebufferRenderbuffer
+from OpenGL.GL import glCheckFramebufferStatus, glDrawBuffer, glReadBuffer
+from OpenGL.GL import glFramebufferTexture2D, GL_TEXTURE_2D
+from OpenGL.GL import GL_READ_FRAMEBUFFER, GL_DRAW_FRAMEBUFFER
+from OpenGL.GL import GL_COLOR_BUFFER_BIT, GL_NEAREST, glBlitFramebuffer
+
+from OpenGL.GLUT import GLUT_DEPTH, GLUT_RGB, GLUT_ALPHA, GLUT_DOUBLE
+
+from OpenGL.GLUT import glutSwapBuffers, glutMainLoop
+from OpenGL.GLUT import glutInitWindowSize, glutPostRedisplay
+from OpenGL.GLUT import glutCreateWindow, glutInit, glutInitWindowPosition
+from OpenGL.GLUT import glutInitDisplayMode, glutLeaveMainLoop, glutDisplayFunc
+from OpenGL.GLUT import glutMainLoopEvent
+
+from numpy import zeros
+
+from .RenderLoop import RenderLoop
+
+ERROR_TEXT = {
+    'BACKEND': "Unknown rendering backend `{}`, expected one of {}",
+    'EGL': "Failed to create EGL context: {} failed",
+    'OSMESA': "Failed to create OSMesa context: {} failed",
+    'FRAMEBUFFER': "Framebuffer object is incomplete, status {}"
+}
+
+WINDOW_TITLE = b"Morphable face model"
+
+
+def create_framebuffer(size, texture=None):
+    """Create framebuffer object with color and depth buffers.
+
+    Colors are stored with 8 bits per channel like in the window,
+    unless 2D texture of the same size is given to store them.
+    """
+    width, height = size
+
+    framebuffer = glGenFramebuffers(1)
+    glBindFramebuffer(GL_FRAMEBUFFER, framebuffer)
+
+    depth = glGenRenderbuffers(1)
+    if texture is None:
+        color = glGenRenderbuffers(1)
+        glBindRenderbuffer(GL_RENDERBUFFER, color)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_RGBA8, width, height)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0,
+                                  GL_RENDERBUFFER, color)
+    else:
+        glFramebufferTexture2D(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0,
+                               GL_TEXTURE_2D, texture, 0)
+    glBindRenderbuffer(GL_RENDERBUFFER, depth)
+    glRenderbufferStorage(GL_RENDERBUFFER, GL_DEPTH24_STENCIL8,
+                          width, height)
+    glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_DEPTH_STENCIL_ATTACHMENT,
+                              GL_RENDERBUFFER, depth)
+    glBindRenderbuffer(GL_RENDERBUFFER, 0)
+
+    status = glCheckFramebufferStatus(GL_FRAMEBUFFER)
+    if status != GL_FRAMEBUFFER_COMPLETE:
+        raise RuntimeError(ERROR_TEXT['FRAMEBUFFER'].format(status))
+    glBindFramebuffer(GL_FRAMEBUFFER, 0)
+    return framebuffer
+
+
+def present_framebuffer(framebuffer, size):
+    """Copy image of given size from framebuffer object to the window."""
+    width, height = size
+    glBindFramebuffer(GL_READ_FRAMEBUFFER, framebuffer)
+    glBindFramebuffer(GL_DRAW_FRAMEBUFFER, 0)
+    glBlitFramebuffer(0, 0, width, height, 0, 0, width, height,
+                      GL_COLOR_BUFFER_BIT, GL_NEAREST)
+
+
+class GLUTContext:
+    """Context of GLUT window.
+
+    Rendered images are presented on the screen.
+    """
+    headless = False
+    framebuffer = 0
+    read_buffer = GL_FRONT
+
+    def __init__(self, size):
+        """Create window with given size."""
+        self.__size = size
+        glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGB | GLUT_ALPHA | GLUT_DEPTH)
+        glutInitWindowSize(*size)
+
+        glutInitWindowPosition(0, 0)
+        glutInit(sys.argv)
+        glutCreateWindow(WINDOW_TITLE)
+
+    def display_func(self, display):
+        """Set function to be called on redisplay."""
+        glutDisplayFunc(display)
+
+    def post_redisplay(self):
+        """Request redisplay of the window."""
+        glutPostRedisplay()
+
+    def swap_buffers(self, framebuffer=None):
+        """Present rendered image.
+
+        Image of framebuffer object is presented if it's given,
+        it's rendered to the window otherwise.
+        """
+        if framebuffer is not None:
+            present_framebuffer(framebuffer, self.__size)
+            glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        glutSwapBuffers()
+
+    def main_loop(self):
+        """Start GLUT main loop."""
+        glutMainLoop()
+
+    def leave_main_loop(self):
+        """Stop GLUT main loop."""
+        glutLeaveMainLoop()
+
+
+class OffscreenContext(RenderLoop):
+    """Base class for contexts without window.
+
+    Renders into framebuffer object instead of the window.
+    Should be initialized after OpenGL context is made current.
+    """
+    headless = True
+    read_buffer = GL_COLOR_ATTACHMENT0
+
+    def __init__(self, size):
+        """Create framebuffer object with given size."""
+        super(OffscreenContext, self).__init__()
+        width, height = size
+
+        self.__framebuffer = create_framebuffer(size)
+        glBindFramebuffer(GL_FRAMEBUFFER, self.__framebuffer)
+        glDrawBuffer(GL_COLOR_ATTACHMENT0)
+        glReadBuffer(GL_COLOR_ATTACHMENT0)
+        glViewport(0, 0, width, height)
+
+    @property
+    def framebuffer(self):
+        """Get framebuffer object used instead of the window."""
+        return self.__framebuffer
+
+    def swap_buffers(self, framebuffer=None):
+        """Nothing to present without window."""
+        pass
+
+
+class PreviewContext(OffscreenContext):
+    """GLUT window which isn't redrawn while fitting.
+
+    Frames are rendered to framebuffer object by the loop without
+    GLUT events and buffer swaps, only every `period`-th of them
+    is presented in the window. Period 0 presents nothing.
+    """
+    def __init__(self, size, period):
+        """Create window with given size and framebuffer object."""
+        GLUTContext(size)
+        super(PreviewContext, self).__init__(size)
+        self.__size = size
+        self.__period = period
+        self.__frames = 0
+
+    def swap_buffers(self, framebuffer=None):
+        """Present the frame if it's time for preview.
+
+        Image of given framebuffer object is presented instead
+        of the one of the context.
+        """
+        self.__frames += 1
+        if self.__period == 0 or self.__frames % self.__period != 0:
+            return
+
+        present_framebuffer(framebuffer if framebuffer is not None
+                            else self.framebuffer, self.__size)
+        glBindFramebuffer(GL_FRAMEBUFFER, self.framebuffer)
+        glutSwapBuffers()
+        # Keep the window responsive without entering GLUT main loop
+        glutMainLoopEvent()
+
+
+class EGLContext(OffscreenContext):
+    """Windowless context created via EGL.
+
+    Works with GPU drivers as well as with Mesa software renderer.
+    """
+    def __init__(self, size):
+        """Create EGL context and make it current."""
+        from OpenGL import EGL
+
+        width, height = size
+        display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+        major, minor = EGL.EGLint(), EGL.EGLint()
+        if not EGL.eglInitialize(display, pointer(major), pointer(minor)):
+            raise RuntimeError(ERROR_TEXT['EGL'].format('eglInitialize'))
+
+        config_attributes = [
+            EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+            EGL.EGL_RED_SIZE, 8,
+            EGL.EGL_GREEN_SIZE, 8,
+            EGL.EGL_BLUE_SIZE, 8,
+            EGL.EGL_ALPHA_SIZE, 8,
+            EGL.EGL_DEPTH_SIZE, 24,
+            EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT,
+            EGL.EGL_NONE
+        ]
+        config_attributes = (EGL.EGLint * len(config_attributes))(
+            *config_attributes)
+        config = EGL.EGLConfig()
+        configs_count = EGL.EGLint()
+        chosen = EGL.eglChooseConfig(display, config_attributes,
+                                     pointer(config), 1,
+                                     pointer(configs_count))
+        if not chosen or configs_count.value == 0:
+            raise RuntimeError(ERROR_TEXT['EGL'].format('eglChooseConfig'))
+
+        surface_attributes = (EGL.EGLint * 5)(
+            EGL.EGL_WIDTH, width, EGL.EGL_HEIGHT, height, EGL.EGL_NONE)
+        surface = EGL.eglCreatePbufferSurface(display, config,
+                                              surface_attributes)
+
+        EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+        context = EGL.eglCreateContext(display, config,
+                                       EGL.EGL_NO_CONTEXT, None)
+        if not EGL.eglMakeCurrent(display, surface, surface, context):
+            raise RuntimeError(ERROR_TEXT['EGL'].format('eglMakeCurrent'))
+
+        self.__display = display
+        self.__surface = surface
+        self.__context = context
+
+        super(EGLContext, self).__init__(size)
+
+
+class OSMesaContext(OffscreenContext):
+    """Windowless context of Mesa software renderer."""
+    def __init__(self, size):
+        """Create OSMesa context and make it current."""
+        from OpenGL import osmesa
+
+        width, height = size
+        attributes = [
+            osmesa.OSMESA_FORMAT, osmesa.OSMESA_RGBA,
+            osmesa.OSMESA_DEPTH_BITS, 24,
+            osmesa.OSMESA_STENCIL_BITS, 8,
+            osmesa.OSMESA_PROFILE, osmesa.OSMESA_COMPAT_PROFILE,
+            osmesa.OSMESA_CONTEXT_MAJOR_VERSION, 4,
+            osmesa.OSMESA_CONTEXT_MINOR_VERSION, 2,
+            0
+        ]
+        context = osmesa.OSMesaCreateContextAttribs(attributes, None)
+        if not context:
+            raise RuntimeError(ERROR_TEXT['OSMESA'].format(
+                'OSMesaCreateContextAttribs'))
+
+        # OSMesa needs the buffer even if rendering goes to framebuffer object
+        self.__buffer = zeros((height, width, 4), dtype='uint8')
+        if not osmesa.OSMesaMakeCurrent(context, self.__buffer,
+                                        GL_UNSIGNED_BYTE, width, height):
+            raise RuntimeError(ERROR_TEXT['OSMESA'].format(
+                'OSMesaMakeCurrent'))
+        self.__context = context
+
+        super(OSMesaContext, self).__init__(size)
+
+
+BACKENDS = {
+    'glut': GLUTContext,
+    'egl': EGLContext,
+    'osmesa': OSMesaContext
+}
+
+
+def create_context(backend, size, preview=None):
+    """Create context of given backend for viewport of provided size.
+
+    If preview period is given, `glut` window renders offscreen
+    and presents only every `preview`-th frame.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(ERROR_TEXT['BACKEND'].format(
+            backend, sorted(BACKENDS)))
+    if backend == 'glut' and preview is not None:
+        return PreviewContext(size, preview)
+    return BACKENDS[backend](size)
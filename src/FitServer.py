@@ -0,0 +1,153 @@
+"""HTTP server fitting images by the model loaded once.
+
+`POST /jobs` accepts JSON with base64 encoded `image` and optional
+`fitters` chain and `initial_face`, defaults are taken from configuration.
+It responds with `id` of the job, which status and result are provided
+by `GET /jobs/<id>`.
+"""
+import json
+from base64 import b64decode
+from io import BytesIO
+from itertools import count
+from threading import Thread, Lock
+
+try:
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+except ImportError:  # Python 2
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+
+from .Batch import fit_target, parse_face
+from .InputLoader import load_image
+
+ERROR_TEXT = {
+    'SIZE': "Image of size {} expected, got {} pixels",
+    'JOB': "Unknown job {}",
+    'REQUEST': "Request should be JSON object with base64 encoded `image`"
+}
+
+JOBS_PATH = '/jobs'
+
+
+class FitServer:
+    """Server queuing fitting jobs to the thread of the Model.
+
+    HTTP requests are handled by their own thread, while jobs are run
+    one by one by `Model.serve`, so the model and the viewport
+    stay initialized between jobs.
+    """
+
+    def __init__(self, model, size, fitters, initial_face,
+                 address=('127.0.0.1', 8000)):
+        """Create server of the Model with headless viewport.
+
+        Fitters chain and initial Face are used by jobs not setting them.
+        """
+        self.__model = model
+        self.__size = size
+        self.__fitters = fitters
+        self.__initial_face = initial_face
+        self.__jobs = {}
+        self.__lock = Lock()
+        self.__ids = count(1)
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                server.handle_post(self)
+
+            def do_GET(self):
+                server.handle_get(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.__server = HTTPServer(address, Handler)
+
+    @property
+    def address(self):
+        """Get address the server listens on."""
+        return self.__server.server_address
+
+    def serve_forever(self):
+        """Handle requests by separate thread and run jobs on this one."""
+        thread = Thread(target=self.__server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        try:
+            self.__model.serve()
+        finally:
+            self.__server.shutdown()
+            self.__server.server_close()
+
+    def shutdown(self):
+        """Stop serving after queued jobs, can be called from any thread."""
+        self.__model.submit(None)
+
+    def handle_post(self, handler):
+        """Queue fitting job of the request."""
+        if handler.path.rstrip('/') != JOBS_PATH:
+            return self.__respond(handler, 404, {'error': 'Not found'})
+        try:
+            length = int(handler.headers.get('Content-Length', 0))
+            job = json.loads(handler.rfile.read(length).decode('utf-8'))
+            image = load_image(BytesIO(b64decode(job['image'])))
+        except (ValueError, KeyError, TypeError, IOError):
+            return self.__respond(handler, 400,
+                                  {'error': ERROR_TEXT['REQUEST']})
+        pixels = self.__size[0] * self.__size[1]
+        if image.size != pixels:
+            return self.__respond(handler, 400, {
+                'error': ERROR_TEXT['SIZE'].format(self.__size, image.size)})
+
+        fitters = job.get('fitters', self.__fitters)
+        initial_face = self.__initial_face
+        if 'initial_face' in job:
+            initial_face = parse_face(job['initial_face'])
+        with self.__lock:
+            job_id = next(self.__ids)
+            self.__jobs[job_id] = {'status': 'queued'}
+        self.__model.submit(
+            lambda: self.__run(job_id, image, fitters, initial_face))
+        self.__respond(handler, 202, {'id': job_id})
+
+    def handle_get(self, handler):
+        """Provide status and result of the job."""
+        path = handler.path.rstrip('/')
+        job = None
+        if path.startswith(JOBS_PATH + '/'):
+            try:
+                with self.__lock:
+                    job = dict(self.__jobs.get(
+                        int(path[len(JOBS_PATH) + 1:]), {}))
+            except ValueError:
+                pass
+        if not job:
+            return self.__respond(handler, 404, {
+                'error': ERROR_TEXT['JOB'].format(path)})
+        self.__respond(handler, 200, job)
+
+    def __run(self, job_id, image, fitters, initial_face):
+        """Fit the image on the thread of the Model."""
+        self.__set_job(job_id, {'status': 'running'})
+        try:
+            result = fit_target(self.__model, image, fitters, initial_face)
+        except Exception as error:
+            self.__set_job(job_id, {'status': 'failed', 'error': str(error)})
+            return
+        self.__set_job(job_id, {'status': 'done', 'result': result})
+
+    def __set_job(self, job_id, job):
+        """Update state of the job."""
+        with self.__lock:
+            self.__jobs[job_id] = job
+
+    @staticmethod
+    def __respond(handler, status, data):
+        """Send JSON response."""
+        body = json.dumps(data).encode('utf-8')
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
@@ -0,0 +1,66 @@
+"""Writing of images and arrays to files by background thread."""
+from collections import deque
+
+from numpy import around, clip, save
+
+from .Worker import Worker
+
+# Writings queued before next one waits for them
+DEFAULT_QUEUE_SIZE = 8
+
+
+def to_image(pixels, size):
+    """Convert float pixels of the viewport to PIL Image.
+
+    Pixels of shape `(pixels, channels)` go from bottom row to top one
+    like OpenGL reads them. One channel provides grayscale image,
+    two channels grayscale with alpha and four channels RGBA.
+    """
+    from PIL import Image
+
+    width, height = size
+    pixels = pixels.reshape(height, width, -1)[::-1]
+    data = around(clip(pixels, 0., 1.) * 255).astype('uint8')
+    if data.shape[2] == 1:
+        data = data[:, :, 0]
+    return Image.fromarray(data)
+
+
+class ImageWriter:
+    """Writer of images and arrays, which doesn't stall rendering.
+
+    Given arrays are written later, so they shouldn't be changed.
+    Errors of writing are raised by next writing or by `close`.
+    """
+
+    def __init__(self, queue_size=DEFAULT_QUEUE_SIZE):
+        """Start writer thread with queue of given size."""
+        self.__worker = Worker(queue_size)
+        self.__jobs = deque()
+
+    def write_image(self, filename, pixels, size):
+        """Queue writing of viewport pixels to PNG file."""
+        self.__submit(ImageWriter.__write_image, filename, pixels, size)
+
+    def write_array(self, filename, array):
+        """Queue writing of array to NumPy file."""
+        self.__submit(save, filename, array)
+
+    def close(self):
+        """Wait for queued writings and stop the thread."""
+        self.__worker.close()
+        while len(self.__jobs) > 0:
+            self.__jobs.popleft().get()
+
+    def __submit(self, function, *args):
+        """Queue the job and check finished ones."""
+        while len(self.__jobs) > 0 and self.__jobs[0].done:
+            self.__jobs.popleft().get()
+        self.__jobs.append(self.__worker.submit(function, *args))
+
+    @staticmethod
+    def __write_image(filename, pixels, size):
+        """Convert pixels and write them to PNG file."""
+        image = to_image(pixels, size)
+        image.save(filename)
+        image.close()
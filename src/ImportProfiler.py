@@ -0,0 +1,102 @@
+"""Measuring of time spent on import of each module."""
+import sys
+from time import time
+
+# Modules reported by default, the slowest ones first
+DEFAULT_REPORT_SIZE = 30
+
+
+class TimedLoader:
+    """Loader measuring execution of modules of another loader."""
+
+    def __init__(self, loader, profiler):
+        """Wrap the loader."""
+        self.__loader = loader
+        self.__profiler = profiler
+
+    def __getattr__(self, name):
+        """Provide other attributes of wrapped loader."""
+        return getattr(self.__loader, name)
+
+    def create_module(self, spec):
+        """Create module by wrapped loader."""
+        return self.__loader.create_module(spec)
+
+    def exec_module(self, module):
+        """Execute module by wrapped loader measuring its time."""
+        self.__profiler.start(module.__name__)
+        try:
+            self.__loader.exec_module(module)
+        finally:
+            self.__profiler.stop()
+
+
+class ImportProfiler:
+    """Finder of modules measuring time of their imports.
+
+    Being the first one in `sys.meta_path`, it finds modules by other
+    finders and wraps their loaders. Time of nested imports is counted
+    in total time of importing module, but not in its own time.
+    """
+
+    def __init__(self):
+        """Initialize without measured imports."""
+        self.__times = {}
+        self.__stack = []
+        self.__finding = set()
+
+    def install(self):
+        """Start measuring of imports."""
+        sys.meta_path.insert(0, self)
+
+    def uninstall(self):
+        """Stop measuring of imports."""
+        sys.meta_path.remove(self)
+
+    def find_spec(self, name, path, target=None):
+        """Find module by other finders and wrap its loader."""
+        if name in self.__finding:
+            return None
+        self.__finding.add(name)
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, 'find_spec'):
+                    continue
+                spec = finder.find_spec(name, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self.__finding.discard(name)
+
+        if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+            spec.loader = TimedLoader(spec.loader, self)
+        return spec
+
+    def start(self, name):
+        """Start measuring import of the module."""
+        self.__stack.append([name, time(), 0.])
+
+    def stop(self):
+        """Finish measuring import of the last started module."""
+        name, start, nested = self.__stack.pop()
+        total = time() - start
+        self.__times[name] = (total - nested, total)
+        if self.__stack:
+            self.__stack[-1][2] += total
+
+    @property
+    def times(self):
+        """Get dict of `(own, total)` import times of modules in seconds."""
+        return dict(self.__times)
+
+    def report(self, output=None, size=DEFAULT_REPORT_SIZE):
+        """Write own and total times of the slowest imports."""
+        output = output if output is not None else sys.stderr
+        slowest = sorted(self.__times.items(),
+                         key=lambda item: item[1][1], reverse=True)
+        output.write('{:>10} {:>10}  module\n'.format('own, ms', 'total, ms'))
+        for name, (own, total) in slowest[:size]:
+            output.write('{:10.1f} {:10.1f}  {}\n'.format(
+                own * 1000, total * 1000, name))
@@ -0,0 +1,71 @@
+"""Planning of Face shape updates by changed coefficients only."""
+from numpy import array, zeros, flatnonzero
+
+# Incremental updates in a row before full recalculation of the shape
+DEFAULT_PERIOD = 32
+# Number of changed coefficients still cheaper to apply than recalculate
+DEFAULT_MAX_CHANGES = 4
+
+
+class IncrementalShape:
+    """Tracks coefficients of the last calculated shape.
+
+    Coordinate-wise fitters change one coefficient at a time,
+    so next shape is the last one plus `delta * PC_j`.
+    Errors accumulated by such updates are bounded by full recalculation
+    after `period` incremental updates in a row.
+    """
+
+    def __init__(self, period=DEFAULT_PERIOD,
+                 max_changes=DEFAULT_MAX_CHANGES):
+        """Initialize without any shape calculated."""
+        self.__period = period
+        self.__max_changes = max_changes
+        self.__coefficients = None
+        self.__updates = 0
+
+    def reset(self):
+        """Forget the last shape, next one will be fully calculated."""
+        self.__coefficients = None
+        self.__updates = 0
+
+    def get_updates(self, faces_coefficients):
+        """Plan updates of the shape to go through coefficients in order.
+
+        For each coefficients array provides:
+        - `None` if the shape stays the same;
+        - `(None, coefficients)` if the shape should be calculated again;
+        - `(indices, deltas)` if changes of coefficients with given indices
+          should be added to the last shape.
+        """
+        updates = []
+        for coefficients in faces_coefficients:
+            # Copy, so that changes of Face coefficients in place are noticed
+            coefficients = array(coefficients, dtype='f')
+            updates.append(self.__get_update(coefficients))
+            self.__coefficients = coefficients
+        return updates
+
+    def __get_update(self, coefficients):
+        """Get update of the last shape to the one of given coefficients."""
+        if self.__coefficients is None:
+            return self.__full_update(coefficients)
+
+        size = max(self.__coefficients.size, coefficients.size)
+        deltas = zeros(size, dtype='f')
+        deltas[:coefficients.size] = coefficients
+        deltas[:self.__coefficients.size] -= self.__coefficients
+        indices = flatnonzero(deltas)
+        if indices.size == 0:
+            return None
+        if (indices.size > self.__max_changes
+                or self.__updates >= self.__period):
+            return self.__full_update(coefficients)
+
+        self.__updates += 1
+        return indices, deltas[indices]
+
+    def __full_update(self, coefficients):
+        """Get full recalculation of the shape."""
+        self.__updates = 0
+        return None, coefficients
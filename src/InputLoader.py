@@ -0,0 +1,97 @@
+"""Loading of target images to fit Faces to."""
+import json
+from glob import glob
+from os import listdir
+from os.path import isdir, join, dirname, splitext
+
+from numpy import asarray
+
+from .Worker import Worker
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff')
+MANIFEST_EXTENSIONS = ('.txt', '.json')
+
+# Images loaded ahead of the one being fitted
+DEFAULT_PREFETCH = 2
+
+
+def load_image(filename):
+    """Load grayscale image as flat array of float in `[0, 1]`.
+
+    Rows go from bottom to top like OpenGL reads them.
+    """
+    from PIL import Image
+
+    image = Image.open(filename)
+    flipped = image.convert('L').transpose(Image.FLIP_TOP_BOTTOM)
+    image.close()
+    data = asarray(flipped, dtype='f')
+    data /= 255
+    return data.reshape(-1)
+
+
+def get_input_paths(path):
+    """Get paths of images given by path.
+
+    Path can be an image, a directory of images, a glob pattern
+    or a manifest: text file with a path per line or JSON list of paths.
+    Paths of manifest are relative to its directory.
+    """
+    extension = splitext(path)[1].lower()
+    if isdir(path):
+        return sorted(join(path, filename) for filename in listdir(path)
+                      if splitext(filename)[1].lower() in IMAGE_EXTENSIONS)
+    if extension in MANIFEST_EXTENSIONS:
+        with open(path) as manifest:
+            if extension == '.json':
+                paths = json.load(manifest)
+            else:
+                paths = [line.strip() for line in manifest]
+        return [join(dirname(path), filename)
+                for filename in paths if filename]
+    if any(character in path for character in '*?['):
+        return sorted(glob(path))
+    return [path]
+
+
+class InputLoader:
+    """Iterator over `(path, image)` of input images.
+
+    Images are decoded by background thread ahead of iteration.
+    """
+
+    def __init__(self, paths, prefetch=DEFAULT_PREFETCH):
+        """Start loading of the first images."""
+        self.__paths = list(paths)
+        self.__worker = Worker()
+        self.__loading = []
+        self.__next = 0
+        for _ in range(max(prefetch, 1)):
+            self.__load_next()
+
+    def __len__(self):
+        """Get number of input images."""
+        return len(self.__paths)
+
+    def __iter__(self):
+        """Get iterator over images."""
+        return self
+
+    def __next__(self):
+        """Get next image, waiting for it to be loaded if needed."""
+        if len(self.__loading) == 0:
+            self.__worker.close()
+            raise StopIteration()
+        path, job = self.__loading.pop(0)
+        self.__load_next()
+        return path, job.get()
+
+    next = __next__  # Python 2
+
+    def __load_next(self):
+        """Start loading of the next image if there is one."""
+        if self.__next < len(self.__paths):
+            path = self.__paths[self.__next]
+            self.__loading.append(
+                (path, self.__worker.submit(load_image, path)))
+            self.__next += 1
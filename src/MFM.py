@@ -1,54 +1,171 @@
 """Singleton module for Morphable Face Model manipulations."""
-from os.path import isfile
+from os import makedirs
+from os import stat
+from os.path import abspath, isdir, isfile, join
 
-from scipy.io import loadmat
 from numpy.random import rand, randn
 from numpy.linalg import norm
-from numpy import array, fabs, floor, load
+from numpy import array, fabs, floor, load, save, zeros, asarray
+from numpy import ascontiguousarray
 
 from .Face import Face
-from .View import View
+from .SetupCache import get_key
 
 DEFAULT_MODEL_PATH = '01_MorphableModel.mat'
 
+# Arrays of the shape model read from the source model
+SOURCE_ARRAYS = ('shapeMU', 'shapePC', 'shapeEV', 'tl')
+# Arrays of compiled model, each one is stored to `<name>.npy` file
+COMPILED_ARRAYS = ('mean_shape', 'basis', 'deviations', 'triangles')
+
+ERROR_TEXT = {
+    'NOT_FOUND': 'Morphable Face Model file `%s` was not found'
+}
+
 __MODEL = None
 __EV_NORMALIZED = None
 __DIMENSIONS = None
+__MEAN_SHAPE = None
+__BASIS = None
+__BASIS_KEY = None
+# Classes of viewports getting the model on initialization
+__VIEWS = []
+
+
+def __get_source_path(path):
+    """Get path of the file of the model the basis is converted from."""
+    if isdir(path):
+        return join(path, 'basis.npy')
+    path_npz = '%s.npz' % path
+    return path_npz if isfile(path_npz) else path
+
 
+def __get_key(path, max_components):
+    """Identify the basis by path, size and time of the model file."""
+    path = abspath(__get_source_path(path))
+    info = stat(path)
+    return get_key(path, info.st_size, info.st_mtime, max_components)
 
-def init(path=None):
+
+def __load_source(path, keep=()):
+    """Load the model from MatLAB file or NumPy archive next to it.
+
+    Only arrays of the shape model and kept ones are read from MatLAB file,
+    NumPy archive reads arrays when they are accessed.
+    """
+    path_npz = '%s.npz' % path
+    if isfile(path_npz):
+        return load(path_npz)
+    if isfile(path):
+        # SciPy is needed only to parse MatLAB files
+        from scipy.io import loadmat
+        return loadmat(path, variable_names=SOURCE_ARRAYS + tuple(keep))
+    raise IOError(ERROR_TEXT['NOT_FOUND'] % path)
+
+
+def __convert(source, max_components=None, keep=()):
+    """Convert arrays of the source model to the compiled layout.
+
+    Principal components are scaled by deviations, one row per component,
+    so that shape of Faces is a single matrix product.
+    Only first `max_components` of them are converted.
+    Triangles are zero-based indices of vertices.
+    """
+    deviations = source['shapeEV'].astype('f').flatten()
+    principal_components = source['shapePC'][:, :max_components].astype('f')
+    model = {
+        'mean_shape': source['shapeMU'].astype('f').flatten(),
+        'basis': ascontiguousarray(
+            principal_components.T
+            * deviations[:principal_components.shape[1], None]),
+        'deviations': deviations,
+        'triangles': (source['tl'] - 1).flatten().astype('uint16')
+    }
+    for name in keep:
+        model[name] = source[name]
+    return model
+
+
+def compile_model(path, directory, keep=()):
+    """Convert the model to directory of arrays loaded by `init`.
+
+    Arrays are stored ready to use, so `init` maps them into memory
+    instead of reading and converting the source model.
+    Arrays of the source model with names from `keep` are stored as is.
+    """
+    model = __convert(__load_source(path, keep), keep=keep)
+    if not isdir(directory):
+        makedirs(directory)
+    for name in COMPILED_ARRAYS + tuple(keep):
+        save(join(directory, '%s.npy' % name), model[name])
+
+
+def init(path=None, max_components=None, keep=()):
     """Initialize Morphable Face Model singleton.
 
-    Loads information from MatLAB file, chaches triangles, principal components
+    Loads information from MatLAB file or directory compiled
+    by `compile_model`, caches triangles, principal components
     and other immutable values used by any Face.
+    Arrays of compiled model are memory-mapped read-only,
+    so processes loading it share the same pages.
+
+    Only first `max_components` principal components are loaded
+    if it's given, Faces and viewports use no more of them.
+    Other arrays of the model are released unless their names
+    are in `keep`, kept arrays are provided by `get_array`.
     """
-    global __MODEL, __DIMENSIONS, __EV_NORMALIZED
+    global __MODEL, __DIMENSIONS, __EV_NORMALIZED, __MEAN_SHAPE, __BASIS
+    global __BASIS_KEY
 
     path = path if path is not None else DEFAULT_MODEL_PATH
-    path_npz = '%s.npz' % path
-    if isfile(path_npz):
-        # savez('mfm.npz', **{x: y for x, y in model.items()
-        #                     if x in ['shapeEV', 'shapePC', 'tl', 'shapeMU']})
-        __MODEL = load('%s.npz' % path)
-    elif isfile(path):
-        __MODEL = loadmat(path)
+    if isdir(path):
+        __MODEL = {name: load(join(path, '%s.npy' % name), mmap_mode='r')
+                   for name in COMPILED_ARRAYS + tuple(keep)}
+        __MODEL['basis'] = __MODEL['basis'][:max_components]
     else:
-        raise IOError('Morphable Model Face file `%s` was not found' % path)
+        __MODEL = __convert(__load_source(path, keep), max_components, keep)
 
-    __EV_NORMALIZED = __MODEL['shapeEV'].flatten() / __MODEL['shapeEV'].min()
+    __BASIS = __MODEL['basis']
+    __DIMENSIONS = __BASIS.shape[0]
+    # Deviations are normalized to the smallest one of the whole model
+    deviations = __MODEL['deviations']
+    __EV_NORMALIZED = deviations[:__DIMENSIONS] / deviations.min()
+    __MEAN_SHAPE = __MODEL['mean_shape']
+    __BASIS_KEY = __get_key(path, max_components)
 
-    principal_components = __MODEL['shapePC'].astype('f')
-    triangles = (__MODEL['tl'] - 1).flatten()
+    for view in __VIEWS:
+        __set_model(view)
 
-    __DIMENSIONS = principal_components.shape[1]
 
-    mean_shape = __MODEL['shapeMU'].astype('f')
-    pc_deviations = __MODEL['shapeEV'].astype('f')
+def register_view(view):
+    """Provide the model to the viewport class now and on each `init`.
+
+    Classes register themselves when their modules are imported,
+    so the model doesn't import viewports it isn't rendered by.
+    """
+    __VIEWS.append(view)
+    if initialized():
+        __set_model(view)
+
+
+def __set_model(view):
+    """Provide arrays and shape engine of the model to viewport class."""
+    # `CPUView` gets vertices from the shape engine only
+    if hasattr(view, 'set_basis'):
+        view.set_basis(__BASIS, __BASIS_KEY)
+        view.set_mean_face(__MEAN_SHAPE)
+    view.set_triangles(__MODEL['triangles'])
+    view.set_shape_engine(get_batch_vertices, update_vertices)
+
+
+def get_array(name):
+    """Get array of the model kept by `init`."""
+    return __MODEL[name]
 
-    View.set_triangles(triangles)
-    View.set_principal_components(principal_components)
-    View.set_deviations(pc_deviations)
-    View.set_mean_face(mean_shape)
+
+def initialized():
+    """Check if the model is loaded."""
+    return __MODEL is not None
 
 
 def __random_cos():
@@ -65,6 +182,51 @@ def get_multipliers(scale=1):
     return floor(scale * __EV_NORMALIZED**.5).astype('i')
 
 
+def get_vertices(coefficients):
+    """Calculate vertices of Faces with given coefficients.
+
+    Accepts coefficients of single Face or `(N, k)` array for batch of Faces
+    and returns array of shape `(V, 3)` or `(N, V, 3)` respectively.
+    Coefficients above the model dimensionality are ignored.
+    """
+    coefficients = asarray(coefficients, dtype='f')
+    count = min(coefficients.shape[-1], __DIMENSIONS)
+    vertices = coefficients[..., :count].dot(__BASIS[:count])
+    vertices += __MEAN_SHAPE
+    return vertices.reshape(coefficients.shape[:-1] + (-1, 3))
+
+
+def get_batch_vertices(coefficients_list):
+    """Calculate vertices for several coefficients arrays at once.
+
+    Arrays may have different lengths, absent coefficients are
+    considered to be zero.
+    """
+    count = max(len(coefficients) for coefficients in coefficients_list)
+    batch = zeros((len(coefficients_list), count), dtype='f')
+    for row, coefficients in zip(batch, coefficients_list):
+        row[:len(coefficients)] = coefficients
+    return get_vertices(batch)
+
+
+def get_faces_vertices(faces):
+    """Calculate vertices of several Faces at once."""
+    return get_batch_vertices([face.coefficients for face in faces])
+
+
+def update_vertices(vertices, indices, deltas):
+    """Add changes of coefficients with given indices to vertices.
+
+    Vertices of shape `(V, 3)` are updated in place,
+    which takes O(V) for each changed coefficient.
+    """
+    indices = asarray(indices)
+    deltas = asarray(deltas, dtype='f')[indices < __DIMENSIONS]
+    indices = indices[indices < __DIMENSIONS]
+    flat_vertices = vertices.reshape(-1)
+    flat_vertices += deltas.dot(__BASIS[indices])
+
+
 def get_face(coefficients=None, directed_light=None, ambient_light=None):
     """Produce new face.
 
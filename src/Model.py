@@ -1,11 +1,17 @@
 """Model of the MVC application."""
+from collections import deque
 from enum import Enum
 
-from OpenGL.GLUT import glutMainLoop
-from PIL import Image
-from numpy import save, array
+try:
+    from queue import Queue
+except ImportError:  # Python 2
+    from Queue import Queue
 
 from src import MFM
+from .ImageWriter import ImageWriter
+from .RenderCache import RenderCache
+from .RenderQueue import RenderQueue
+from .Worker import Worker, Job
 
 
 class Texture(Enum):
@@ -17,22 +23,54 @@ class Texture(Enum):
     light = 0
 
 
+class Snapshot:
+    """Callback writing image of the frame to file.
+
+    Its requests aren't counted as rendered frames or Faces,
+    so that snapshots aren't taken of snapshots.
+    """
+
+    def __init__(self, model, filename):
+        """Write images by the Model to given file."""
+        self.__model = model
+        self.__filename = filename
+
+    def __call__(self, image):
+        """Write rendered image."""
+        self.__model.write_image(self.__filename, image)
+
+
 class Model:
     """Main processor of the application.
 
     Makes calculations for Faces, works with Fitters and requests
     View to render.
     """
-    def __init__(self, view):
+    def __init__(self, view, pipeline=False, cache_size=0,
+                 cache_images=False):
         """Create model with given View.
 
         Creates initial light and rotation conditions and renders first Face.
+        If `pipeline` is set, costs of images are calculated by worker thread
+        while next Faces are rendered.
+        Up to `cache_size` errors of rendered Faces are cached,
+        as well as images if `cache_images` is set.
         """
         self.__face = None
         self.__view = view
         self.__fitter = None
-        self.__on_draw_callbacks = []
+        self.__on_draw_callbacks = RenderQueue()
         self.__now_processing = False
+        self.__reading_frame = None
+        self.__delivering = deque()
+        self.__worker = Worker() if pipeline else None
+        self.__cache = RenderCache(cache_size) if cache_size > 0 else None
+        self.__cache_images = cache_images
+        self.__writer = None
+        self.__frames = 0
+        self.__rendered_faces = 0
+        self.__snapshots = None
+        self.__submissions = Queue()
 
         self.__texture = Texture.light
 
@@ -55,17 +93,54 @@ class Model:
         self.__face = face
         self.__view.face = face
 
-    def start(self, fitter):
-        """Start main application loop."""
+    @property
+    def cache(self):
+        """Get cache of rendered Faces or `None` if it's disabled."""
+        return self.__cache
+
+    @property
+    def rendered_faces(self):
+        """Get number of Faces rendered by the Model."""
+        return self.__rendered_faces
+
+    def start(self, fitter, optimize=False):
+        """Start main application loop.
+
+        Fitting procedure is started immediately if `optimize` is set,
+        otherwise it waits for command from the input.
+        """
         self.__fitter = fitter
-        glutMainLoop()
+        if optimize:
+            self.optimize()
+        self.__view.main_loop()
+        self.__close_writer()
+
+    def submit(self, function):
+        """Call function on the thread running `serve`.
+
+        Can be called from any thread, functions are called in order.
+        `None` stops serving.
+        """
+        self.__submissions.put(function)
+
+    def serve(self):
+        """Call submitted functions until `None` is submitted.
+
+        Functions are called one by one on this thread, so they can
+        render with headless viewport and wait for its main loop.
+        """
+        while True:
+            function = self.__submissions.get()
+            if function is None:
+                return
+            function()
 
     def redraw(self, callback=None):
         """Trigger rendering procedure."""
         # print('redrawing')
         self.__view.redraw(callback)
 
-    def request_image(self, face, callback):
+    def request_image(self, face, callback, priority=0, token=None):
         """Send request for rendered face with given parameters.
 
         Adds callback with given face to queue and starts
@@ -76,25 +151,259 @@ class Model:
           and sends callback function;
         - Model renders Face with given parameters and sends achived
           image via callback.
+
+        Image is reused after callback returns, so it should be copied
+        to be kept.
+
+        Requests of higher priority are rendered earlier, queued requests
+        with given token can be dropped by `cancel`.
+        """
+        self.__request(face, callback, None, None, priority, token)
+
+    def request_cost(self, face, cost, callback, priority=0, token=None):
+        """Send request for cost of rendered face.
+
+        Cost function takes the image and its result is passed to callback.
+        In pipelined mode the function is called by worker thread,
+        callbacks are called on rendering thread in order of requests.
+        """
+        self.__request(face, callback, None, cost, priority, token)
+
+    def request_error(self, face, target, callback, priority=0, token=None):
+        """Send request for error of rendered face against target image.
+
+        Callback receives `(error, covered_pixels_count)`, where error
+        is mean squared difference over covered pixels.
+        It is calculated by View, so the image itself is not read.
+        """
+        self.__request(face, callback, target, None, priority, token)
+
+    def request_images(self, faces, callback, priority=0, token=None):
+        """Send request for rendered faces.
+
+        Callback receives list of images in order of given faces.
+        Queued faces are rendered by batches of View batch size.
+        """
+        images = [None] * len(faces)
+        remaining = [len(faces)]
+
+        def receive_image(index, image):
+            images[index] = image.copy()
+            remaining[0] -= 1
+            if remaining[0] == 0:
+                callback(images)
+
+        if len(faces) == 0:
+            callback(images)
+        for index, face in enumerate(faces):
+            self.request_image(
+                face, lambda image, index=index: receive_image(index, image),
+                priority, token)
+
+    def cancel(self, token):
+        """Drop queued requests with given token.
+
+        Requests which are already rendered are still delivered.
+        """
+        return self.__on_draw_callbacks.cancel(token)
+
+    def reset(self):
+        """Drop queued requests and frames which aren't delivered.
+
+        Should be called after fitting is interrupted by an exception,
+        so that the next fitting doesn't get its requests.
+        Images of dropped frames are released to the viewport.
         """
+        self.__on_draw_callbacks = RenderQueue()
+        self.__now_processing = False
+        if self.__reading_frame is not None and self.__reading_frame[2]:
+            self.__view.release_images(self.__view.get_read_images())
+        self.__reading_frame = None
+        while len(self.__delivering) > 0:
+            _, _, images, costs = self.__delivering.popleft()
+            # Worker may still calculate costs of the images
+            if costs is not None:
+                costs.wait()
+            if images:
+                self.__view.release_images(images)
+
+    def __request(self, face, callback, target, cost, priority, token):
+        """Queue request and start rendering if nothing is processed.
+
+        Results found in the cache are delivered without rendering,
+        still in order of requests.
+        """
+        cached = None
+        if (self.__cache is not None and cost is None
+                and (target is not None or self.__cache_images)):
+            cached = self.__cache.get(face, target)
+        request = (face, callback, target, cost, cached)
         if len(self.__on_draw_callbacks) == 0 and not self.__now_processing:
             self.__now_processing = True
-            self.__view.face = face
-            self.redraw(lambda: self.__on_redraw(callback))
+            if not self.__render([request]):
+                self.__on_redraw([request])
         else:
-            self.__on_draw_callbacks.append((face, callback))
+            self.__on_draw_callbacks.push(request, priority, token)
+
+    def __render(self, requests):
+        """Render Faces of given requests in one frame.
+
+        Provides `False` without rendering if all results are cached.
+        """
+        rendered = [request for request in requests if request[4] is None]
+        if len(rendered) == 0:
+            return False
+        targets = [target for _, _, target, _, _ in rendered
+                   if target is not None]
+        self.__view.faces = [face for face, _, _, _, _ in rendered]
+        self.__view.target = targets[0] if len(targets) > 0 else None
+        self.redraw(lambda: self.__on_redraw(requests))
+        return True
+
+    def __pop_requests(self):
+        """Get queued requests for the next frame.
+
+        Requests of errors in one frame should have the same target.
+        Cached requests don't take tiles of the frame.
+        """
+        targets = []
+        tiles = [0]
 
-    def __on_redraw(self, callback):
+        def accept(request):
+            _, _, target, _, cached = request
+            if cached is not None:
+                return True
+            if tiles[0] == self.__view.batch_size:
+                return False
+            if target is not None:
+                if len(targets) == 0:
+                    targets.append(target)
+                elif target is not targets[0]:
+                    return False
+            tiles[0] += 1
+            return True
+
+        return self.__on_draw_callbacks.pop_many(
+            len(self.__on_draw_callbacks), accept)
+
+    def __on_redraw(self, requests):
+        """Process rendered frame and frames answered by the cache."""
+        while requests is not None:
+            requests = self.__process_frame(requests)
+
+    def __process_frame(self, requests):
+        """Read rendered images and render next queued requests.
+
+        While requests are queued, images of the frame are delivered
+        after the next frame is requested, so that reading of one frame
+        overlaps with rendering of another. In pipelined mode costs
+        of the frame are delivered one frame later as well.
+        Errors are delivered with images of their frame.
+
+        Provides next requests if all of them are cached.
+        """
         # print('redraw callback')
-        img = array(self.__view.get_image())
-        img = img.reshape(img.size//4, 4)
-        callback(img)
+        rendered = [request for request in requests if request[4] is None]
+        counted = [request for request in rendered
+                   if not isinstance(request[1], Snapshot)]
+        if len(counted) > 0:
+            self.__frames += 1
+            self.__rendered_faces += len(counted)
+            if (self.__snapshots is not None
+                    and self.__frames % self.__snapshots[1] == 0):
+                self.__request_snapshot(counted[0][0])
+        errors = None
+        if any(target is not None for _, _, target, _, _ in rendered):
+            errors = self.__view.get_errors()
+        images = any(target is None for _, _, target, _, _ in rendered)
+        if images:
+            self.__view.read_images()
+
+        reading_frame = self.__reading_frame
+        self.__reading_frame = (requests, errors, images)
+        if reading_frame is not None:
+            self.__evaluate(*reading_frame)
+
+        if not images or len(self.__on_draw_callbacks) == 0:
+            self.__reading_frame = None
+            self.__evaluate(requests, errors, images)
         if len(self.__on_draw_callbacks) > 0:
-            face, callback = self.__on_draw_callbacks.pop(0)
-            self.__view.face = face
-            self.redraw(lambda: self.__on_redraw(callback))
+            self.__deliver(1 if self.__worker is not None else 0)
         else:
-            self.__now_processing = False
+            self.__deliver(0)
+            if len(self.__on_draw_callbacks) == 0:
+                self.__now_processing = False
+                return None
+
+        requests = self.__pop_requests()
+        return None if self.__render(requests) else requests
+
+    def __evaluate(self, requests, errors, images):
+        """Get images of the earliest read frame and calculate their costs.
+
+        Costs are calculated by worker thread in pipelined mode.
+        """
+        if images:
+            images = self.__view.get_read_images()
+        costs = None
+        if any(cost is not None for _, _, _, cost, _ in requests):
+            if self.__worker is not None:
+                costs = self.__worker.submit(self.__get_costs,
+                                             requests, images)
+            else:
+                costs = Job(self.__get_costs, requests, images)
+                costs.run()
+        self.__delivering.append((requests, errors, images, costs))
+
+    @staticmethod
+    def __get_tiles(requests):
+        """Get tiles of rendered requests, `None` for cached ones."""
+        tiles = []
+        count = 0
+        for request in requests:
+            if request[4] is not None:
+                tiles.append(None)
+            else:
+                tiles.append(count)
+                count += 1
+        return tiles
+
+    @staticmethod
+    def __get_costs(requests, images):
+        """Calculate costs of images requested by cost functions."""
+        return [request[3](images[tile]) if request[3] is not None else None
+                for request, tile in zip(requests,
+                                         Model.__get_tiles(requests))]
+
+    def __deliver(self, keep):
+        """Deliver evaluated frames in order except the last `keep` ones.
+
+        Waits for costs of the frames to be calculated.
+        Rendered errors and images are kept in the cache.
+        """
+        while len(self.__delivering) > keep:
+            requests, errors, images, costs = self.__delivering.popleft()
+            if costs is not None:
+                costs = costs.get()
+            tiles = self.__get_tiles(requests)
+            for (face, callback, target, cost, cached), tile in zip(
+                    requests, tiles):
+                if cached is not None:
+                    # Callbacks may change images
+                    callback(cached if target is not None else cached.copy())
+                elif target is not None:
+                    if self.__cache is not None:
+                        self.__cache.put(face, target, errors[tile])
+                    callback(errors[tile])
+                elif cost is not None:
+                    callback(costs[tile])
+                else:
+                    if self.__cache is not None and self.__cache_images:
+                        self.__cache.put(face, None, images[tile].copy())
+                    callback(images[tile])
+            # Callbacks should copy images they keep
+            if images:
+                self.__view.release_images(images)
 
     @staticmethod
     def generate_face():
@@ -139,24 +448,55 @@ class Model:
     def close(self):
         """Close the viewport"""
         self.__view.close()
+        if self.__worker is not None:
+            self.__worker.close()
+        self.__close_writer()
 
     def optimize(self):
         """Start the fitting procedure."""
         self.__fitter.start()
 
-    def save_image(self, filename):
-        """Render current viewport state to file.
-
-        If shadow map used, result will be simply rendered.
-        Also light conditions will be saved to NumPy file.
-        """
-        size = self.__view.get_size()
-        image = Image.new('RGBA', size)
-        data = (self.__view.get_image() * 255).astype('i')
-        data = data.reshape(size[1], size[0], 4)[::-1, :, :].flatten()
-        pixels = [tuple(data[i*4:i*4+4]) for i in range(size[0]*size[1])]
-        image.putdata(pixels)
-        image.save(filename + '.png')
-        image.close()
-        with open(filename + '.array.npy', 'wb') as f:
-            save(f, self.__face.as_array)
+    def save_image(self, filename, image=None):
+        """Save image of the viewport to file.
+
+        If image got from View isn't given, current viewport state is read.
+        Also Face parameters will be saved to NumPy file.
+        Files are written by background thread.
+        """
+        if image is None:
+            image = self.__view.get_image().reshape(-1, 4)
+        writer = self.__get_writer()
+        writer.write_image(filename + '.png', image.copy(),
+                           self.__view.get_size())
+        writer.write_array(filename + '.array.npy', self.__face.as_array)
+
+    def write_image(self, filename, image):
+        """Save image of the viewport to PNG file by background thread."""
+        self.__get_writer().write_image(filename, image.copy(),
+                                        self.__view.get_size())
+
+    def save_snapshots(self, prefix, period):
+        """Save image of every `period`-th rendered frame while fitting.
+
+        The first Face of the frame is rendered again to
+        `<prefix>.<frame>.png` file. Renders of snapshots aren't
+        counted as frames or rendered Faces.
+        """
+        self.__snapshots = (prefix, period)
+
+    def __request_snapshot(self, face):
+        """Request image of the Face for snapshot of current frame."""
+        filename = '{}.{:06d}.png'.format(self.__snapshots[0], self.__frames)
+        self.request_image(face, Snapshot(self, filename))
+
+    def __get_writer(self):
+        """Get writer of files, start it if needed."""
+        if self.__writer is None:
+            self.__writer = ImageWriter()
+        return self.__writer
+
+    def __close_writer(self):
+        """Wait for files to be written."""
+        if self.__writer is not None:
+            self.__writer.close()
+            self.__writer = None
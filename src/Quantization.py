@@ -0,0 +1,55 @@
+"""Compact storage of the model basis for shaders."""
+from numpy import abs as absolute, around, ones, zeros, sqrt
+
+# Formats of basis texture: NumPy type of its values
+BASIS_FORMATS = {
+    'float32': 'f',
+    'float16': 'float16',
+    'int16': 'int16'
+}
+
+# Largest value of signed normalized 16-bit integer
+INT16_MAX = 2**15 - 1
+
+# Components of the basis quantized at once when errors are measured
+CHUNK_SIZE = 16
+
+
+def quantize_basis(basis, basis_format):
+    """Convert basis to given format.
+
+    Provides values and scale of each component, which the values
+    should be multiplied by. Only `int16` components are scaled,
+    each one to the full range of normalized integers.
+    """
+    scales = ones(basis.shape[0], dtype='f')
+    if basis_format != 'int16':
+        return basis.astype(BASIS_FORMATS[basis_format]), scales
+
+    maximums = absolute(basis).max(axis=1)
+    scales[maximums > 0] = maximums[maximums > 0]
+    values = around(basis / scales[:, None] * INT16_MAX).astype('int16')
+    return values, scales
+
+
+def dequantize_basis(values, scales):
+    """Restore basis from values and scales like shaders do."""
+    if values.dtype == 'int16':
+        return values / float(INT16_MAX) * scales[:, None]
+    return values.astype('f')
+
+
+def get_vertex_errors(basis, basis_format, bound=1.):
+    """Get the largest shift of each vertex caused by quantization.
+
+    Error is bounded for all coefficients within `[-bound; bound]`
+    by the sum of errors of vertex deltas of all components.
+    """
+    errors = zeros(basis.shape[1] // 3, dtype='d')
+    for start in range(0, basis.shape[0], CHUNK_SIZE):
+        chunk = basis[start:start + CHUNK_SIZE]
+        deltas = dequantize_basis(*quantize_basis(chunk, basis_format))
+        deltas -= chunk
+        errors += sqrt((deltas.reshape(len(chunk), -1, 3)**2).sum(axis=2)
+                       ).sum(axis=0)
+    return bound * errors
@@ -0,0 +1,74 @@
+"""Cache of results of rendered Faces."""
+from collections import OrderedDict
+
+from numpy import around, append
+
+# Face parameters closer than that are treated as the same
+DEFAULT_QUANTUM = 1e-6
+
+
+class RenderCache:
+    """Least recently used results of rendered Faces.
+
+    Results are keyed by quantized parameters of the Face and the target
+    errors are calculated against, which is compared by identity.
+    Render settings are the same for one Model, so each Model
+    should have its own cache.
+    """
+
+    def __init__(self, size, quantum=DEFAULT_QUANTUM):
+        """Create cache keeping up to `size` results."""
+        self.__size = size
+        self.__quantum = quantum
+        self.__entries = OrderedDict()
+        self.__hits = 0
+        self.__misses = 0
+
+    def __len__(self):
+        """Get number of cached results."""
+        return len(self.__entries)
+
+    @property
+    def hits(self):
+        """Get number of results found in the cache."""
+        return self.__hits
+
+    @property
+    def misses(self):
+        """Get number of results not found in the cache."""
+        return self.__misses
+
+    def get(self, face, target=None):
+        """Get result for the Face and the target or `None`."""
+        key = self.__get_key(face, target)
+        entry = self.__entries.pop(key, None)
+        if entry is None or entry[0] is not target:
+            self.__misses += 1
+            return None
+        self.__entries[key] = entry
+        self.__hits += 1
+        return entry[1]
+
+    def put(self, face, target, result):
+        """Keep result for the Face and the target.
+
+        The least recently used result is dropped if the cache is full.
+        """
+        if self.__size <= 0:
+            return
+        key = self.__get_key(face, target)
+        self.__entries.pop(key, None)
+        self.__entries[key] = (target, result)
+        if len(self.__entries) > self.__size:
+            self.__entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all results."""
+        self.__entries.clear()
+
+    def __get_key(self, face, target):
+        """Get key of quantized Face parameters and the target."""
+        # Array of the Face doesn't contain ambient light
+        parameters = append(face.as_array, face.ambient_light)
+        parameters = around(parameters / self.__quantum).astype('int64')
+        return parameters.tobytes(), id(target) if target is not None else None
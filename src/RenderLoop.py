@@ -0,0 +1,31 @@
+class RenderLoop:
+    """Main loop for rendering without windowing system.
+
+    Mimics GLUT main loop: display function is called while redisplay
+    is requested, and the loop exits when there is nothing left to render.
+    """
+    def __init__(self, display=None):
+        """Create loop with given display function."""
+        self.__display = display
+        self.__redisplay = False
+        self.__running = False
+
+    def display_func(self, display):
+        """Set function to be called on redisplay."""
+        self.__display = display
+
+    def post_redisplay(self):
+        """Request display function to be called by the loop."""
+        self.__redisplay = True
+
+    def main_loop(self):
+        """Call display function until no redisplay is requested."""
+        self.__running = True
+        while self.__running and self.__redisplay:
+            self.__redisplay = False
+            self.__display()
+        self.__running = False
+
+    def leave_main_loop(self):
+        """Stop the loop after current display call."""
+        self.__running = False
@@ -0,0 +1,223 @@
+"""Viewport rendering frames by pool of processes."""
+from collections import deque
+from multiprocessing import Process, Queue, RawArray
+
+from numpy import frombuffer
+
+from . import MFM
+from .BufferPool import BufferPool
+from .RenderLoop import RenderLoop
+
+# Frames kept in shared memory at once, one is read while other is rendered
+FRAMES = 2
+
+
+def render_worker(size, options, memory, slot_size, tasks, results):
+    """Render Faces of tasks by own viewport.
+
+    Images are written to slots of shared memory, errors are sent back.
+    Task `None` stops the worker.
+    """
+    from .Batch import create_view
+
+    if not MFM.initialized():
+        MFM.init(options.get('model'), options.get('max_components'))
+    view = create_view(size, options)
+    slots = frombuffer(memory, dtype='f').reshape(-1, slot_size)
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        slot, faces, target = task
+        if target is not False:
+            view.target = target
+        view.render(faces)
+        errors = view.get_errors() if view.target is not None else None
+        view.read_images()
+        images = view.get_read_images()
+        for tile, image in enumerate(images):
+            slots[slot + tile] = image.reshape(-1)
+        view.release_images(images)
+        results.put(errors)
+
+
+class RenderPool:
+    """Viewport splitting each frame between processes.
+
+    Every process has its own headless viewport created by options
+    of `view` configuration section and renders up to its batch size
+    of Faces of the frame. Images come back through shared memory,
+    so the frame of the pool is `processes` times bigger.
+    """
+
+    headless = True
+
+    def __init__(self, size, processes, options):
+        """Start processes rendering frames of given size."""
+        options = dict(options, render_processes=1)
+        width, height = size
+        channels = 4
+        if (options['backend'] != 'cpu'
+                and options.get('read_format', 'rgba32f') != 'rgba32f'):
+            channels = 2
+        self.__size = size
+        self.__process_batch_size = options.get('batch_size', 1)
+        self.__batch_size = processes * self.__process_batch_size
+
+        slot_size = width * height * channels
+        memory = RawArray('f', FRAMES * self.__batch_size * slot_size)
+        self.__slots = frombuffer(memory, dtype='f').reshape(-1, slot_size)
+        self.__images = BufferPool((width * height, channels), 'f',
+                                   2 * self.__batch_size)
+
+        self.__tasks = [Queue() for _ in range(processes)]
+        self.__results = [Queue() for _ in range(processes)]
+        self.__processes = []
+        for tasks, results in zip(self.__tasks, self.__results):
+            process = Process(target=render_worker, args=(
+                size, options, memory, slot_size, tasks, results))
+            process.daemon = True
+            process.start()
+            self.__processes.append(process)
+        # Target is sent to process only when it changes
+        self.__targets = [None] * processes
+
+        self.__light = None
+        self.__faces = []
+        self.__target = None
+        self.__callback = None
+        self.__frame = 0
+        self.__rendering = None
+        self.__first_slot = 0
+        self.__errors = None
+        self.__reads = deque()
+
+        self.__loop = RenderLoop(self.__display)
+
+    def get_size(self):
+        """Get size of the viewport."""
+        return self.__size
+
+    @property
+    def light(self):
+        """Get light direction."""
+        return self.__light
+
+    @light.setter
+    def light(self, light):
+        """Set light direction."""
+        self.__light = light
+
+    @property
+    def batch_size(self):
+        """Get maximal number of Faces rendered in one frame."""
+        return self.__batch_size
+
+    @property
+    def face(self):
+        """Get current Face."""
+        return self.__faces[0] if len(self.__faces) > 0 else None
+
+    @face.setter
+    def face(self, face):
+        """Set current Face."""
+        self.__faces = [face]
+
+    @property
+    def faces(self):
+        """Get Faces rendered in one frame."""
+        return self.__faces
+
+    @faces.setter
+    def faces(self, faces):
+        """Set Faces to be rendered in one frame."""
+        assert 0 < len(faces) <= self.__batch_size
+        self.__faces = list(faces)
+
+    @property
+    def target(self):
+        """Get image errors of rendered Faces are calculated against."""
+        return self.__target
+
+    @target.setter
+    def target(self, target):
+        """Set image to calculate errors of rendered Faces against."""
+        self.__target = target
+
+    def redraw(self, callback=None):
+        """Send Faces to processes and trigger callback after render.
+
+        Processes render while the callback of previous frame is running.
+        """
+        self.__callback = callback
+        first_slot = self.__frame * self.__batch_size
+        self.__frame = (self.__frame + 1) % FRAMES
+        size = self.__process_batch_size
+        chunks = range(0, len(self.__faces), size)
+        for process, start in enumerate(chunks):
+            target = self.__target
+            if self.__targets[process] is target:
+                target = False
+            self.__targets[process] = self.__target
+            self.__tasks[process].put(
+                (first_slot + start, self.__faces[start:start + size],
+                 target))
+        self.__rendering = (first_slot, len(chunks))
+        self.__loop.post_redisplay()
+
+    def get_image(self):
+        """Get data of the first Face of the last frame."""
+        return self.__slots[self.__first_slot]
+
+    def get_images(self):
+        """Get images of all rendered Faces."""
+        self.read_images()
+        return self.get_read_images()
+
+    def read_images(self):
+        """Keep slots of images of the last frame to be got later."""
+        self.__reads.append((self.__first_slot, len(self.__faces)))
+
+    def get_read_images(self):
+        """Get images of the earliest reading done by `read_images`."""
+        first_slot, count = self.__reads.popleft()
+        images = []
+        for slot in range(first_slot, first_slot + count):
+            image = self.__images.lease()
+            image.reshape(-1)[:] = self.__slots[slot]
+            images.append(image)
+        return images
+
+    def release_images(self, images):
+        """Return images got from the viewport for reuse."""
+        for image in images:
+            self.__images.release(image)
+
+    def get_errors(self):
+        """Get errors of rendered Faces against the target."""
+        return self.__errors
+
+    def main_loop(self):
+        """Render requested Faces until there is nothing left."""
+        self.__loop.main_loop()
+
+    def close(self):
+        """Stop rendering and processes."""
+        self.__loop.leave_main_loop()
+        for tasks in self.__tasks:
+            tasks.put(None)
+        for process in self.__processes:
+            process.join()
+
+    def __display(self):
+        """Wait for processes to render the frame and trigger callback."""
+        first_slot, processes = self.__rendering
+        errors = []
+        for results in self.__results[:processes]:
+            process_errors = results.get()
+            if process_errors is not None:
+                errors.extend(process_errors)
+        self.__first_slot = first_slot
+        self.__errors = errors
+        if self.__callback is not None:
+            self.__callback()
@@ -0,0 +1,64 @@
+"""Queue of render requests with priorities and cancellation."""
+from collections import deque
+
+
+class RenderQueue:
+    """Requests are popped by priority, then in order of pushing.
+
+    Each priority keeps its own deque, so pushing and popping
+    don't depend on number of queued requests. Requests pushed
+    with a token can be cancelled together by `cancel`.
+    """
+
+    def __init__(self):
+        """Create empty queue."""
+        self.__queues = {}
+        self.__priorities = []
+        self.__length = 0
+
+    def __len__(self):
+        """Get number of queued requests."""
+        return self.__length
+
+    def push(self, request, priority=0, token=None):
+        """Queue request, higher priority is popped earlier."""
+        if priority not in self.__queues:
+            self.__queues[priority] = deque()
+            self.__priorities = sorted(self.__queues, reverse=True)
+        self.__queues[priority].append((request, token))
+        self.__length += 1
+
+    def pop_many(self, count, accept=None):
+        """Pop up to `count` requests in order.
+
+        If `accept` function is given, popping stops at the first request
+        it rejects, which stays in the queue.
+        """
+        requests = []
+        for priority in self.__priorities:
+            queue = self.__queues[priority]
+            while len(queue) > 0 and len(requests) < count:
+                request, _ = queue[0]
+                if accept is not None and not accept(request):
+                    return self.__popped(requests)
+                queue.popleft()
+                requests.append(request)
+        return self.__popped(requests)
+
+    def cancel(self, token):
+        """Remove queued requests pushed with given token.
+
+        Provides number of removed requests.
+        """
+        removed = 0
+        for priority, queue in self.__queues.items():
+            kept = deque(item for item in queue if item[1] is not token)
+            removed += len(queue) - len(kept)
+            self.__queues[priority] = kept
+        self.__length -= removed
+        return removed
+
+    def __popped(self, requests):
+        """Account popped requests."""
+        self.__length -= len(requests)
+        return requests
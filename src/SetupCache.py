@@ -0,0 +1,74 @@
+"""Cache of program binaries and texture data kept between starts."""
+from hashlib import sha1
+from os import getpid, makedirs, rename
+from os.path import isdir, isfile, join
+
+from numpy import array, frombuffer, load, save
+
+
+def get_key(*parts):
+    """Get hash of parts, which are strings, bytes or numbers."""
+    digest = sha1()
+    for part in parts:
+        if not isinstance(part, bytes):
+            part = str(part).encode('utf-8')
+        digest.update(part)
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class SetupCache:
+    """Directory of files produced by viewport initialization.
+
+    Program binaries are stored with their formats, arrays
+    are stored as `.npy` files and memory-mapped when loaded.
+    Files are written under temporary names and renamed,
+    so that processes starting at once don't read partial ones.
+    """
+
+    def __init__(self, directory):
+        """Use given directory, it's created if needed."""
+        if not isdir(directory):
+            makedirs(directory)
+        self.__directory = directory
+
+    def __get_path(self, key, name):
+        """Get path of the file of given key."""
+        return join(self.__directory, '{}.{}'.format(key, name))
+
+    def __write(self, path, write):
+        """Write the file by given function and move it to the path."""
+        temporary_path = '{}.{}.tmp'.format(path, getpid())
+        with open(temporary_path, 'wb') as output:
+            write(output)
+        rename(temporary_path, path)
+
+    def get_program(self, key):
+        """Get `(format, binary)` of the program or `None`."""
+        path = self.__get_path(key, 'bin')
+        if not isfile(path):
+            return None
+        with open(path, 'rb') as program_file:
+            data = program_file.read()
+        return int(frombuffer(data[:4], dtype='<u4')[0]), data[4:]
+
+    def put_program(self, key, binary_format, binary):
+        """Store binary of the program with its format."""
+        header = array([binary_format], dtype='<u4').tobytes()
+        self.__write(self.__get_path(key, 'bin'),
+                     lambda output: output.write(header + binary))
+
+    def get_arrays(self, key, names):
+        """Get dict of arrays with given names or `None`."""
+        paths = [self.__get_path(key, '{}.npy'.format(name))
+                 for name in names]
+        if not all(isfile(path) for path in paths):
+            return None
+        return {name: load(path, mmap_mode='r')
+                for name, path in zip(names, paths)}
+
+    def put_arrays(self, key, arrays):
+        """Store arrays of dict by their names."""
+        for name, data in arrays.items():
+            self.__write(self.__get_path(key, '{}.npy'.format(name)),
+                         lambda output: save(output, data))
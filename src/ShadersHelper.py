@@ -6,6 +6,7 @@ from OpenGL.GL import glBindBuffer, glBufferData, glVertexAttribPointer
 from OpenGL.GL import glEnableVertexAttribArray, glGetAttribLocation
 from OpenGL.GL import glCreateShader, glShaderSource, glCompileShader
 from OpenGL.GL import glAttachShader, GL_ARRAY_BUFFER, glUseProgram
+from OpenGL.GL import GL_ELEMENT_ARRAY_BUFFER
 from OpenGL.GL import glGetUniformLocation, glUniformMatrix4fv, glUniform1fv
 from OpenGL.GL import glUniform1iv
 from OpenGL.GL import glUniform4f
@@ -23,29 +24,68 @@ from OpenGL.GL import GL_DEPTH_COMPONENT, GL_TEXTURE_WRAP_S, GL_TEXTURE_WRAP_T
 from OpenGL.GL import GL_REPEAT, GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_NONE
 from OpenGL.GL import glBindFramebuffer, glDrawBuffer, glReadBuffer
 from OpenGL.GL import glTexParameteri, glFramebufferTexture2D
-from OpenGL.GL import glDetachShader, glGenFramebuffers
+from OpenGL.GL import glGenFramebuffers, glBufferSubData, glBindBufferBase
+from OpenGL.GL import GL_UNIFORM_BUFFER, GL_DYNAMIC_DRAW
+from OpenGL.GL import glTransformFeedbackVaryings, GL_INTERLEAVED_ATTRIBS
+from OpenGL.GL import GLchar
+from OpenGL.GL import GL_R16F, GL_RG16F, GL_RGB16F, GL_RGBA16F, GL_HALF_FLOAT
+from OpenGL.GL import GL_R16_SNORM, GL_RG16_SNORM, GL_RGB16_SNORM
+from OpenGL.GL import GL_RGBA16_SNORM, GL_SHORT
+from OpenGL.GL import glGetString, GL_VENDOR, GL_RENDERER, GL_VERSION
+from OpenGL.GL import glProgramParameteri, glProgramBinary, glGetProgramBinary
+from OpenGL.GL import GL_PROGRAM_BINARY_RETRIEVABLE_HINT, glDeleteProgram
+from OpenGL.GL import GL_PROGRAM_BINARY_LENGTH
+
+from ctypes import c_char_p, cast, POINTER
+
+from numpy import zeros
 
-from OpenGL.arrays.vbo import VBO
+from shaders import get_shader_path
 
-from numpy import concatenate
+from .SetupCache import get_key
 
-from shaders import get_shader_path
+# Internal formats of float textures by data format and number of components,
+# type of uploaded data by data format
+TEXTURE_FORMATS = {
+    'float32': ((GL_R32F, GL_RG32F, GL_RGB32F, GL_RGBA32F), GL_FLOAT),
+    'float16': ((GL_R16F, GL_RG16F, GL_RGB16F, GL_RGBA16F), GL_HALF_FLOAT),
+    'int16': ((GL_R16_SNORM, GL_RG16_SNORM, GL_RGB16_SNORM, GL_RGBA16_SNORM),
+              GL_SHORT)
+}
 
 
 class ShadersHelper:
-    """Helper class to work with program and shaders."""
+    """Helper class to work with programs and shaders."""
 
     def __init__(self, vertex, fragment, number_of_buffers=0,
-                 number_of_textures=0):
-        """Initialize program with shaders."""
-        self.__program = glCreateProgram()
-        self.__current_shaders = {}
-        self.__shaders = {
+                 number_of_textures=0, varyings=None, programs=None,
+                 defines=None, cache=None):
+        """Initialize programs with shaders.
+
+        Program is linked up front for each pair of indices of vertex
+        and fragment shaders in `programs`, by default shaders with
+        the same indices are paired.
+        Fragment shaders can be omitted for programs which only capture
+        `varyings` of vertex shader with transform feedback.
+        Macros of `defines` dict are defined for all shaders.
+
+        Binaries of linked programs are stored to `SetupCache`
+        if it's given and loaded from it instead of compiling shaders
+        when the driver and sources are the same.
+        """
+        self.__sources = {
             GL_VERTEX_SHADER: [],
             GL_FRAGMENT_SHADER: []
         }
+        self.__shaders = {}
+        self.__cache = cache
+        self.__programs = {}
+        self.__locations = {}
+        self.__uniform_buffers = {}
+        self.__varyings = varyings
         self.__depth_map_fbo = None
-        self.__attributes = []
+        self.__indices_id = None
+        self.__defines = defines or {}
 
         if not isinstance(vertex, list):
             vertex = [vertex]
@@ -56,10 +96,13 @@ class ShadersHelper:
         for f in fragment:
             self.__load_shader(get_shader_path(f), GL_FRAGMENT_SHADER)
 
-        self.change_shader(0, 0)
-
-        glLinkProgram(self.__program)
-        assert glGetProgramiv(self.__program, GL_LINK_STATUS) == GL_TRUE
+        if programs is None:
+            programs = [(i, i if fragment else None)
+                        for i in range(len(vertex))]
+        for shaders in programs:
+            self.__programs[shaders] = self.__link_program(*shaders)
+        self.__current_shaders = programs[0]
+        self.__program = self.__programs[self.__current_shaders]
 
         self.__vao_id = glGenVertexArrays(1)
         glBindVertexArray(self.__vao_id)
@@ -75,55 +118,165 @@ class ShadersHelper:
         self.__textures = []
 
     def change_shader(self, vertex=None, fragment=None):
-        """Change vertex and fragment shader of current program.
+        """Switch to the program of given vertex and fragment shaders.
 
-        Needs indices of shaders from the list.
+        Needs indices of shaders from the list,
+        `None` keeps shader of current program.
+        Programs not linked up front are linked on first use.
         """
-        changed = False
-        if vertex is not None:
-            changed |= self.__attach_shader(
-                self.__shaders[GL_VERTEX_SHADER][vertex], GL_VERTEX_SHADER)
+        shaders = (self.__current_shaders[0] if vertex is None else vertex,
+                   self.__current_shaders[1] if fragment is None
+                   else fragment)
+        if shaders not in self.__programs:
+            self.__programs[shaders] = self.__link_program(*shaders)
+        self.__current_shaders = shaders
+        self.__program = self.__programs[shaders]
+
+    def __link_program(self, vertex, fragment):
+        """Link program of shaders with given indices."""
+        key = None
+        if self.__cache is not None:
+            key = self.__get_program_key(vertex, fragment)
+            program = self.__load_program(key)
+            if program is not None:
+                return program
+
+        program = glCreateProgram()
+        glAttachShader(program, self.__get_shader(GL_VERTEX_SHADER, vertex))
         if fragment is not None:
-            changed |= self.__attach_shader(
-                self.__shaders[GL_FRAGMENT_SHADER][fragment],
-                GL_FRAGMENT_SHADER)
-        if not changed:
+            glAttachShader(program,
+                           self.__get_shader(GL_FRAGMENT_SHADER, fragment))
+        if self.__varyings:
+            self.__set_varyings(program, self.__varyings)
+        if key is not None:
+            glProgramParameteri(program, GL_PROGRAM_BINARY_RETRIEVABLE_HINT,
+                                GL_TRUE)
+        glLinkProgram(program)
+        assert glGetProgramiv(program, GL_LINK_STATUS) == GL_TRUE
+        if key is not None:
+            self.__store_program(key, program)
+        return program
+
+    def __get_program_key(self, vertex, fragment):
+        """Get key of the program by driver and sources of shaders."""
+        return get_key(glGetString(GL_VENDOR), glGetString(GL_RENDERER),
+                       glGetString(GL_VERSION),
+                       self.__sources[GL_VERTEX_SHADER][vertex],
+                       fragment is not None
+                       and self.__sources[GL_FRAGMENT_SHADER][fragment],
+                       self.__varyings)
+
+    def __load_program(self, key):
+        """Create program from cached binary.
+
+        Provides `None` if there is no binary or the driver rejects it.
+        """
+        cached = self.__cache.get_program(key)
+        if cached is None:
+            return None
+        binary_format, binary = cached
+        program = glCreateProgram()
+        glProgramBinary(program, binary_format, binary, len(binary))
+        if glGetProgramiv(program, GL_LINK_STATUS) != GL_TRUE:
+            glDeleteProgram(program)
+            return None
+        return program
+
+    def __store_program(self, key, program):
+        """Store binary of linked program to the cache."""
+        length = glGetProgramiv(program, GL_PROGRAM_BINARY_LENGTH)
+        if length == 0:
             return
-        glLinkProgram(self.__program)
-        assert glGetProgramiv(self.__program, GL_LINK_STATUS) == GL_TRUE
-
-    def __attach_shader(self, shader_id, shader_type):
-        """Attach the shader to the program."""
-        if shader_type in self.__current_shaders:
-            if self.__current_shaders[shader_type] == shader_id:
-                return False
-            glDetachShader(self.__program, self.__current_shaders[shader_type])
-        self.__current_shaders[shader_type] = shader_id
-        glAttachShader(self.__program, shader_id)
-        return True
+        binary = zeros(length, dtype='uint8')
+        written = zeros(1, dtype='int32')
+        binary_format = zeros(1, dtype='uint32')
+        glGetProgramBinary(program, length, written, binary_format, binary)
+        self.__cache.put_program(key, binary_format[0],
+                                 binary[:written[0]].tobytes())
+
+    def __get_shader(self, shader_type, index):
+        """Get shader of given type and index, compile it on first use."""
+        key = (shader_type, index)
+        if key not in self.__shaders:
+            shader_id = glCreateShader(shader_type)
+            glShaderSource(shader_id, self.__sources[shader_type][index])
+            glCompileShader(shader_id)
+            self.__shaders[key] = shader_id
+        return self.__shaders[key]
+
+    def __set_varyings(self, program, varyings):
+        """Set outputs of vertex shader captured by transform feedback."""
+        names = (c_char_p * len(varyings))(
+            *[name.encode() for name in varyings])
+        glTransformFeedbackVaryings(
+            program, len(varyings),
+            cast(names, POINTER(POINTER(GLchar))), GL_INTERLEAVED_ATTRIBS)
+
+    def __get_uniform_location(self, name):
+        """Get location of uniform in current program.
+
+        Locations are cached, as they don't change after linking.
+        """
+        key = (self.__program, name)
+        if key not in self.__locations:
+            location = glGetUniformLocation(self.__program, name)
+            assert location >= 0
+            self.__locations[key] = location
+        return self.__locations[key]
 
     def __load_shader(self, shader_filename, shader_type):
-        """Load shader of specific type from file."""
+        """Load source of shader of specific type from file."""
         shader_source = ''
         with open(shader_filename) as shader_file:
             shader_source = shader_file.read()
             assert shader_source
 
-        shader_id = glCreateShader(shader_type)
-        self.__shaders[shader_type].append(shader_id)
-        glShaderSource(shader_id, shader_source)
-        glCompileShader(shader_id)
+        if self.__defines:
+            # Macros should follow the version directive
+            version, rest = shader_source.split('\n', 1)
+            shader_source = '\n'.join(
+                [version] + ['#define {} {}'.format(name, value)
+                             for name, value in sorted(self.__defines.items())]
+                + [rest])
+
+        self.__sources[shader_type].append(shader_source)
 
     def add_attribute(self, vid, data, name):
-        """Add array vertex attribute for shaders."""
+        """Upload array vertex attribute for shaders.
+
+        Data is uploaded once to the buffer and stored in vertex array,
+        shaders should be in use.
+        """
         if data.ndim > 1:
             data = data.flatten()
         glBindBuffer(GL_ARRAY_BUFFER, self.__vbo_id[vid])
         glBufferData(GL_ARRAY_BUFFER, data.nbytes, data, GL_STATIC_DRAW)
-        glVertexAttribPointer(glGetAttribLocation(self.__program, name),
-                              3, GL_FLOAT, GL_FALSE, 0, None)
-        glEnableVertexAttribArray(vid)
-        self.__attributes.append(data)
+        self.bind_attribute_buffer(self.__vbo_id[vid], name)
+
+    def add_indices(self, data):
+        """Upload indices of vertices to draw elements by.
+
+        Element buffer is stored in vertex array, so drawing needs
+        no indices from client memory after the shaders are in use.
+        """
+        glBindVertexArray(self.__vao_id)
+        self.__indices_id = glGenBuffers(1)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.__indices_id)
+        glBufferData(GL_ELEMENT_ARRAY_BUFFER, data.nbytes, data,
+                     GL_STATIC_DRAW)
+
+    def bind_attribute_buffer(self, buffer_id, name, components=3):
+        """Use existing buffer of floats as vertex attribute for shaders.
+
+        Binding is stored in vertex array, so it's enough to do it once.
+        """
+        location = glGetAttribLocation(self.__program, name)
+        assert location >= 0
+        glBindBuffer(GL_ARRAY_BUFFER, buffer_id)
+        glVertexAttribPointer(location, components, GL_FLOAT, GL_FALSE,
+                              0, None)
+        glEnableVertexAttribArray(location)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
 
     def use_shaders(self):
         """Switch shaders on."""
@@ -132,35 +285,45 @@ class ShadersHelper:
 
     def bind_uniform_matrix(self, data, name):
         """Bind uniform matrix parameter."""
-        location = glGetUniformLocation(self.__program, name)
-        assert location >= 0
+        location = self.__get_uniform_location(name)
         glUniformMatrix4fv(location, 1, GL_FALSE, data.flatten())
 
     def bind_uniform_vector(self, data, name):
         """Bind uniform vector parameter."""
-        location = glGetUniformLocation(self.__program, name)
-        assert location >= 0
+        location = self.__get_uniform_location(name)
         glUniform4f(location, *data.flatten())
 
     def bind_uniform_floats(self, data, name):
         """Bind uniform float array."""
-        location = glGetUniformLocation(self.__program, name)
-        assert location >= 0
+        location = self.__get_uniform_location(name)
         glUniform1fv(location, data.size, data.flatten())
 
     def bind_uniform_ints(self, data, name):
         """Bind uniform int array."""
-        location = glGetUniformLocation(self.__program, name)
-        assert location >= 0
+        location = self.__get_uniform_location(name)
         glUniform1iv(location, data.size, data.flatten())
 
-    def bind_buffer(self):
-        """Prepare attributes and bind them."""
-        VBO(concatenate(self.__attributes)).bind()
+    def create_uniform_buffer(self, binding, size):
+        """Create uniform buffer of given size in bytes.
+
+        Buffer is bound to the binding point for uniform blocks
+        of all programs declaring it.
+        """
+        buffer_id = glGenBuffers(1)
+        glBindBuffer(GL_UNIFORM_BUFFER, buffer_id)
+        glBufferData(GL_UNIFORM_BUFFER, size, None, GL_DYNAMIC_DRAW)
+        glBindBuffer(GL_UNIFORM_BUFFER, 0)
+        glBindBufferBase(GL_UNIFORM_BUFFER, binding, buffer_id)
+        self.__uniform_buffers[binding] = buffer_id
+
+    def update_uniform_buffer(self, binding, data):
+        """Upload data laid out by `std140` rules to uniform buffer."""
+        glBindBuffer(GL_UNIFORM_BUFFER, self.__uniform_buffers[binding])
+        glBufferSubData(GL_UNIFORM_BUFFER, 0, data.nbytes, data)
+        glBindBuffer(GL_UNIFORM_BUFFER, 0)
 
     def clear(self):
-        """Unbind all bound entities and clear cache."""
-        self.__attributes = []
+        """Unbind all bound entities."""
         glUseProgram(0)
         glBindVertexArray(0)
 
@@ -208,13 +371,16 @@ class ShadersHelper:
         """Rebind depth map FBO for current program and shaders."""
         glBindFramebuffer(GL_FRAMEBUFFER, self.__depth_map_fbo)
 
-    def create_float_texture(self, data, size, dimensions=2, components=3):
+    def create_float_texture(self, data, size, dimensions=2, components=3,
+                             data_format='float32'):
         """Bind texture with floating point vectors within.
 
         dimensions: dimensionality of the texture
                     vector, matrix, 3D matrix.
         components: dimensionality of texture element
                     number or 2D, 3D, 4D vector.
+        data_format: values stored as `float32`, `float16`
+                     or `int16` normalized to [-1; 1].
         """
         if dimensions == 1:
             texture_type = GL_TEXTURE_1D
@@ -226,26 +392,17 @@ class ShadersHelper:
             texture_type = GL_TEXTURE_3D
             texture_store = glTexImage3D
 
-        if components == 1:
-            internal_format = GL_R32F
-            texture_format = GL_RED
-        if components == 2:
-            internal_format = GL_RG32F
-            texture_format = GL_RG
-        if components == 3:
-            internal_format = GL_RGB32F
-            texture_format = GL_RGB
-        if components == 4:
-            internal_format = GL_RGBA32F
-            texture_format = GL_RGBA
+        internal_formats, data_type = TEXTURE_FORMATS[data_format]
+        internal_format = internal_formats[components - 1]
+        texture_format = (GL_RED, GL_RG, GL_RGB, GL_RGBA)[components - 1]
 
         glBindTexture(texture_type, self.__textures_ids[len(self.__textures)])
         glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
 
         # HACK: Python <3.5 doesn't allow to use *size
         # within enumerable arguments
-        params = ([texture_type, 0, internal_format]
-                  + list(size) + [0, texture_format, GL_FLOAT, data.flatten()])
+        params = ([texture_type, 0, internal_format] + list(size)
+                  + [0, texture_format, data_type, data.reshape(-1)])
         texture_store(*params)
 
         glTexParameterf(texture_type, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
@@ -255,6 +412,5 @@ class ShadersHelper:
 
     def link_texture(self, name, number):
         """Link the texture to shaders."""
-        location = glGetUniformLocation(self.__program, name)
-        assert location >= 0
+        location = self.__get_uniform_location(name)
         glUniform1i(location, number)
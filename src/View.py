@@ -1,83 +1,224 @@
-import sys
-from math import ceil
+from collections import deque
+from ctypes import c_void_p
+from math import ceil, log
 
 from OpenGL.GL import GL_LESS, GL_TRUE, GL_DEPTH_TEST, GL_STENCIL_TEST
 from OpenGL.GL import GL_COLOR_ARRAY, GL_VERTEX_ARRAY, GL_TRIANGLES
 from OpenGL.GL import GL_COLOR_BUFFER_BIT, GL_DEPTH_BUFFER_BIT
-from OpenGL.GL import GL_UNSIGNED_SHORT, GL_FLOAT
-from OpenGL.GL import GL_CULL_FACE, GL_FRONT, GL_MODELVIEW_MATRIX
+from OpenGL.GL import GL_UNSIGNED_SHORT, GL_UNSIGNED_BYTE, GL_FLOAT
+from OpenGL.GL import GL_CULL_FACE, GL_FRONT
 
-from OpenGL.GL import glLoadIdentity, glOrtho
 from OpenGL.GL import glDepthMask, glDepthFunc, glCullFace, glDisable
 from OpenGL.GL import glEnable, glClearColor, glEnableClientState, glClear
-from OpenGL.GL import glDrawElements, glGetFloatv, glFinish
-from OpenGL.GL import glActiveTexture, glBindFramebuffer
+from OpenGL.GL import glDrawElements
+from OpenGL.GL import glActiveTexture, glBindFramebuffer, glViewport
 from OpenGL.GL import GL_TEXTURE0, GL_TEXTURE1, GL_FRAMEBUFFER
+from OpenGL.GL import GL_READ_FRAMEBUFFER, GL_COLOR_ATTACHMENT0
 
 from OpenGL.GL import glReadBuffer, glReadPixels, GL_RGBA, glPolygonOffset
-from OpenGL.GL import GL_POLYGON_OFFSET_FILL
-
-from OpenGL.GLUT import GLUT_DEPTH, GLUT_RGB, GLUT_ALPHA, GLUT_DOUBLE
+from OpenGL.GL import GL_POLYGON_OFFSET_FILL, GL_RED, GL_ALPHA
+from OpenGL.GL import GL_PIXEL_PACK_BUFFER, GL_STREAM_READ, GL_PACK_ALIGNMENT
+from OpenGL.GL import glGetBufferSubData, glPixelStorei
+
+from OpenGL.GL import glGenTextures, glBindTexture, glTexImage2D
+from OpenGL.GL import glTexParameteri, glGenerateMipmap, glGetTexImage
+from OpenGL.GL import GL_TEXTURE_2D, GL_TEXTURE2, GL_R32F, GL_RG32F, GL_RG
+from OpenGL.GL import GL_TEXTURE_MIN_FILTER, GL_TEXTURE_MAG_FILTER, GL_NEAREST
+
+from OpenGL.GL import glGenBuffers, glBindBuffer, glBufferData
+from OpenGL.GL import glBufferSubData, glBindBufferBase, glDrawArrays
+from OpenGL.GL import glBeginTransformFeedback, glEndTransformFeedback
+from OpenGL.GL import GL_ARRAY_BUFFER, GL_DYNAMIC_COPY, GL_STATIC_DRAW
+from OpenGL.GL import GL_POINTS
+from OpenGL.GL import GL_TRANSFORM_FEEDBACK_BUFFER, GL_RASTERIZER_DISCARD
+
+from numpy import zeros, arange, concatenate, dtype, array, nan
+
+from . import MFM
+from .Camera import get_rotation_matrix
+from .Context import create_context, create_framebuffer
+from .BufferPool import BufferPool
+from .IncrementalShape import IncrementalShape
+from .ShadersHelper import ShadersHelper
+from .Quantization import BASIS_FORMATS, quantize_basis
+from .SetupCache import SetupCache, get_key
 
-from OpenGL.GLUT import glutSwapBuffers
-from OpenGL.GLUT import glutInitWindowSize, glutPostRedisplay
-from OpenGL.GLUT import glutCreateWindow, glutInit, glutInitWindowPosition
-from OpenGL.GLUT import glutInitDisplayMode, glutLeaveMainLoop, glutDisplayFunc
+# Binding points of uniform blocks of shaders
+FRAME_BINDING = 0
+SHAPE_BINDING = 1
 
-from OpenGL.GLU import gluLookAt
+# Uniform block `Frame`: two matrices and light vector
+FRAME_BLOCK_SIZE = (16 + 16 + 4) * 4
 
-from numpy import zeros, ones, array, concatenate
+# Width of texture of principal components
+PCA_TEXTURE_COLUMNS = 2**13
 
-from .ShadersHelper import ShadersHelper
+# Format, type and NumPy type of read color values by read format
+READ_FORMATS = {
+    'rgba32f': (GL_RGBA, GL_FLOAT, 'f'),
+    'red32f': (GL_RED, GL_FLOAT, 'f'),
+    'red16': (GL_RED, GL_UNSIGNED_SHORT, 'uint16'),
+    'red8': (GL_RED, GL_UNSIGNED_BYTE, 'uint8')
+}
 
 
 class View:
     """Viewport for Faces."""
 
     __triangles = None
-    __principal_components = None
-    __deviations = None
+    __basis = None
+    __basis_key = None
     __mean_face = None
-
-    def __init__(self, size):
-        """Initialize viewport with initial Face rotation and position."""
+    __get_vertices = None
+    __update_vertices = None
+
+    def __init__(self, size, backend='glut', batch_size=1, shape='gpu',
+                 read_format='rgba32f', preview=None, basis_format='float32',
+                 setup_cache=None):
+        """Initialize viewport with initial Face rotation and position.
+
+        Backend sets OpenGL context to render in:
+        - `glut` renders to the window;
+        - `egl` and `osmesa` render offscreen without windowing system.
+
+        Up to `batch_size` Faces can be rendered in one frame,
+        each to its own tile of offscreen framebuffer.
+
+        Shape sets where Face vertices are calculated:
+        - `gpu` accumulates principal components in vertex shader
+          and captures vertices with transform feedback;
+        - `cpu` uploads vertices calculated by the shape engine.
+        Vertices are kept in the shape buffer and reused by both passes
+        until coefficients of rendered Face change.
+        When only few coefficients change, the shape is updated
+        by them instead of being calculated again.
+
+        Read format sets pixels of images of rendered Faces:
+        - `rgba32f` provides all channels as float;
+        - `red32f`, `red16` and `red8` read red channel only as float,
+          16-bit or 8-bit integer and 8-bit alpha as coverage mask,
+          images are provided as `[red, alpha]` pairs of float.
+
+        Preview sets fitting mode of `glut` backend: Faces are rendered
+        offscreen by tight loop and only every `preview`-th frame
+        is presented in the window, the viewport is headless then.
+
+        Basis format sets how `gpu` shape stores principal components:
+        `float32`, `float16` or `int16` scaled for each component.
+
+        Setup cache is a directory to keep program binaries and texture
+        of principal components in, so that next viewports load them
+        instead of compiling shaders and converting the basis.
+        """
+        assert shape in ('gpu', 'cpu')
+        assert read_format in READ_FORMATS
+        assert basis_format in BASIS_FORMATS
         self.__size = size
+        self.__shape = shape
+        self.__read_format = read_format
+        self.__cache = (SetupCache(setup_cache) if setup_cache is not None
+                        else None)
 
         self.__height, self.__width = self.__size
         self.__output_image = zeros(self.__width * self.__height * 4,
                                     dtype='f')
 
+        self.__batch_size = batch_size
+        self.__columns = int(ceil(batch_size ** .5))
+        self.__rows = int(ceil(batch_size / float(self.__columns)))
+        self.__batch_framebuffer = None
+
+        pixels = self.__width * self.__height * self.__columns * self.__rows
+        self.__read_data = zeros(pixels * 4 * 4, dtype='uint8')
+        self.__reads = deque()
+        # Images of two frames are used at once, while one is read
+        channels = 4 if read_format == 'rgba32f' else 2
+        self.__images = BufferPool((self.__width * self.__height, channels),
+                                   'f', 2 * batch_size)
+
         self.__light = None
         self.__face = None
+        self.__faces = []
+        self.__shapes = {}
+        self.__vertices = None
+        self.__shape_updates = IncrementalShape()
         self.__model_matrix = zeros((4, 4), dtype='f')
         self.__light_matrix = zeros((4, 4), dtype='f')
 
-        self.__init_display()
+        self.__context = create_context(backend, self.__size, preview)
         self.__enable_depth_test()
+        if batch_size > 1:
+            self.__batch_framebuffer = create_framebuffer(
+                (self.__width * self.__columns,
+                 self.__height * self.__rows))
 
         glEnableClientState(GL_COLOR_ARRAY)
         glEnableClientState(GL_VERTEX_ARRAY)
 
         glClearColor(1., 1., 1., 0.)
 
+        # Frame is read to one buffer while previous one is read from other
+        self.__pixel_buffers = glGenBuffers(2)
+        for pixel_buffer in self.__pixel_buffers:
+            glBindBuffer(GL_PIXEL_PACK_BUFFER, pixel_buffer)
+            glBufferData(GL_PIXEL_PACK_BUFFER, self.__read_data.nbytes, None,
+                         GL_STREAM_READ)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        self.__pixel_buffer = 0
+
+        self.__target = None
+        self.__target_data = None
+        self.__target_texture = None
+        self.__error_texture = None
+        self.__error_framebuffer = None
+
+        self.__morph = None
+        self.__mean_buffer = None
+        self.__basis_scales = None
+        if shape == 'gpu':
+            self.__morph = ShadersHelper(
+                'morph.vert', [], 0, 1, varyings=['position'],
+                defines=self.__get_shape_defines(), cache=self.__cache)
+            self.__morph.use_shaders()
+            self.__morph.link_texture('principal_components', 0)
+            # Uniform block `Shape`: indices and coefficients of vectors
+            self.__morph.create_uniform_buffer(
+                SHAPE_BINDING, self.__get_shape_block_length() * 4)
+            self.__bind_pca_texture(basis_format)
+            self.__morph.clear()
+            self.__mean_buffer = self.__create_buffer(View.__mean_face,
+                                                      GL_STATIC_DRAW)
+
+        # Shapes are captured by turns, so that the last one can be updated
+        self.__shape_buffers = [self.__create_buffer(None, GL_DYNAMIC_COPY)
+                                for _ in range(2)]
+        self.__shape_buffer = self.__shape_buffers[0]
+
         self.__sh = ShadersHelper(['face.vert', 'depth.vert'],
-                                  ['face.frag', 'depth.frag'], 1, 2)
+                                  ['face.frag', 'depth.frag', 'error.frag'],
+                                  0, 1, programs=[(0, 0), (1, 1), (0, 2)],
+                                  cache=self.__cache)
 
-        glutDisplayFunc(self.__display)
+        self.__context.display_func(self.__display)
         self.__callback = None
 
-        self.__sh.add_attribute(0, self.__mean_face, 'mean_position')
-        self.__sh.bind_buffer()
         self.__sh.use_shaders()
-        self.__sh.link_texture('principal_components', 0)
+        self.__sh.bind_attribute_buffer(self.__shape_buffer, 'position')
+        self.__sh.add_indices(View.__triangles.astype('uint16'))
         self.__sh.link_texture('depth_map', 1)
-        self.__bind_pca_texture()
+        self.__sh.create_uniform_buffer(FRAME_BINDING, FRAME_BLOCK_SIZE)
         self.__sh.bind_depth_texture(self.__size)
+        self.__sh.clear()
 
     def get_size(self):
         """Get size of the viewport."""
         return self.__size
 
+    @property
+    def headless(self):
+        """Check whether the viewport renders without window."""
+        return self.__context.headless
+
     @property
     def light(self):
         """Get light direction."""
@@ -88,32 +229,198 @@ class View:
         """Set light direction."""
         self.__light = light
 
+    @property
+    def batch_size(self):
+        """Get maximal number of Faces rendered in one frame."""
+        return self.__batch_size
+
     @property
     def face(self):
         """Get current Face."""
-        return self.__face
+        return self.__faces[0] if len(self.__faces) > 0 else None
 
     @face.setter
     def face(self, face):
         """Set current Face."""
-        self.__face = face
+        self.__faces = [face]
+
+    @property
+    def faces(self):
+        """Get Faces rendered in one frame."""
+        return self.__faces
+
+    @faces.setter
+    def faces(self, faces):
+        """Set Faces to be rendered in one frame."""
+        assert 0 < len(faces) <= self.__batch_size
+        self.__faces = list(faces)
+
+    @property
+    def target(self):
+        """Get image errors of rendered Faces are calculated against."""
+        return self.__target
+
+    @target.setter
+    def target(self, target):
+        """Set image to calculate errors of rendered Faces against.
+
+        Image is uploaded once, `None` turns errors calculation off.
+        """
+        self.__target = target
+        if target is None or target is self.__target_data:
+            return
+        self.__target_data = target
+        if self.__error_texture is None:
+            self.__create_error_atlas()
+
+        # Target fills tile of the atlas, so shader finds its pixel by modulo
+        data = zeros((self.__error_tile, self.__error_tile), dtype='f')
+        data[:self.__height, :self.__width] = array(target).reshape(
+            self.__height, self.__width)
+        glBindTexture(GL_TEXTURE_2D, self.__target_texture)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_R32F, self.__error_tile,
+                     self.__error_tile, 0, GL_RED, GL_FLOAT, data)
+        glBindTexture(GL_TEXTURE_2D, 0)
 
     def redraw(self, callback=None):
         """Trigger redisplay and trigger callback after render."""
         # print('Set callback to', callback)
         self.__callback = callback
-        glutPostRedisplay()
+        self.__context.post_redisplay()
 
     def get_image(self):
         """Copy RGBA data from the viewport to NumPy Matrix of float."""
-        glReadBuffer(GL_FRONT)
+        glReadBuffer(self.__context.read_buffer)
         glReadPixels(0, 0, self.__width, self.__height, GL_RGBA, GL_FLOAT,
                      self.__output_image)
         return self.__output_image
 
+    def get_images(self):
+        """Get images of all rendered Faces.
+
+        Images are arrays of shape `(pixels, channels)` in order of Faces,
+        channels depend on read format.
+        """
+        self.read_images()
+        return self.get_read_images()
+
+    def read_images(self):
+        """Start reading images of rendered Faces to pixel buffer.
+
+        Returns without waiting for the reading to finish,
+        so that next frame can be rendered meanwhile.
+        Images are provided by `get_read_images` in order of reading,
+        and can be returned for reuse by `release_images`.
+        """
+        count = len(self.__faces)
+        if count == 1:
+            width, height = self.__width, self.__height
+            glReadBuffer(self.__context.read_buffer)
+        else:
+            width = self.__width * self.__columns
+            height = self.__height * int(ceil(count / float(self.__columns)))
+            glBindFramebuffer(GL_READ_FRAMEBUFFER, self.__batch_framebuffer)
+            glReadBuffer(GL_COLOR_ATTACHMENT0)
+
+        color_format, color_type, color_dtype = READ_FORMATS[
+            self.__read_format]
+        color_size = width * height * dtype(color_dtype).itemsize
+        if color_format == GL_RGBA:
+            color_size *= 4
+
+        pixel_buffer = self.__pixel_buffers[self.__pixel_buffer]
+        self.__pixel_buffer = 1 - self.__pixel_buffer
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, pixel_buffer)
+        glPixelStorei(GL_PACK_ALIGNMENT, 1)
+        glReadPixels(0, 0, width, height, color_format, color_type,
+                     c_void_p(0))
+        if color_format != GL_RGBA:
+            glReadPixels(0, 0, width, height, GL_ALPHA, GL_UNSIGNED_BYTE,
+                         c_void_p(color_size))
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        glBindFramebuffer(GL_READ_FRAMEBUFFER, self.__context.framebuffer)
+
+        self.__reads.append((pixel_buffer, count, width, height, color_size))
+
+    def get_read_images(self):
+        """Get images of the earliest reading started by `read_images`.
+
+        Waits for the reading to finish if needed.
+        """
+        pixel_buffer, count, width, height, color_size = (
+            self.__reads.popleft())
+        color_format, _, color_dtype = READ_FORMATS[self.__read_format]
+        size = color_size
+        if color_format != GL_RGBA:
+            size += width * height
+        data = self.__read_data[:size]
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, pixel_buffer)
+        glGetBufferSubData(GL_PIXEL_PACK_BUFFER, 0, size, data)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+
+        colors = data[:color_size].view(color_dtype).reshape(
+            height, width, -1)
+        alpha = None
+        if color_format != GL_RGBA:
+            alpha = data[color_size:].reshape(height, width)
+        images = []
+        for tile in range(count):
+            row, column = divmod(tile, self.__columns)
+            rows = slice(row * self.__height, (row + 1) * self.__height)
+            columns = slice(column * self.__width,
+                            (column + 1) * self.__width)
+            image = self.__images.lease()
+            self.__convert_pixels(
+                colors[rows, columns],
+                alpha[rows, columns] if alpha is not None else None, image)
+            images.append(image)
+        return images
+
+    def release_images(self, images):
+        """Return images got from the viewport for reuse.
+
+        Images shouldn't be used after that.
+        """
+        for image in images:
+            self.__images.release(image)
+
+    def get_errors(self):
+        """Get errors of rendered Faces against the target.
+
+        Error is mean squared difference of red channel and the target
+        over covered pixels, provided as `(error, covered_pixels_count)`
+        for each Face. Sums are reduced by mipmaps of the errors atlas,
+        so only a texel per Face is read.
+        """
+        glBindTexture(GL_TEXTURE_2D, self.__error_texture)
+        glGenerateMipmap(GL_TEXTURE_2D)
+        level = int(round(log(self.__error_tile, 2)))
+        glPixelStorei(GL_PACK_ALIGNMENT, 1)
+        glGetTexImage(GL_TEXTURE_2D, level, GL_RG, GL_FLOAT,
+                      self.__error_sums)
+        glBindTexture(GL_TEXTURE_2D, 0)
+        sums = self.__error_sums.astype('d')
+
+        texels = self.__error_tile ** 2
+        errors = []
+        for tile in range(len(self.__faces)):
+            row, column = divmod(tile, self.__columns)
+            error, coverage = sums[row, column] * texels
+            count = int(round(coverage))
+            errors.append((error / count if count > 0 else nan, count))
+        return errors
+
+    def main_loop(self):
+        """Process redraw requests.
+
+        Returns when the viewport is closed or,
+        for headless viewport, when there is nothing left to render.
+        """
+        self.__context.main_loop()
+
     def close(self):
         """Close the viewport."""
-        glutLeaveMainLoop()
+        self.__context.leave_main_loop()
 
     @staticmethod
     def set_triangles(triangles):
@@ -125,14 +432,14 @@ class View:
         View.__triangles = triangles
 
     @staticmethod
-    def set_principal_components(principal_components):
-        """Set principal components for Face calculation."""
-        View.__principal_components = principal_components
+    def set_basis(basis, key=None):
+        """Set principal components scaled by deviations.
 
-    @staticmethod
-    def set_deviations(deviations):
-        """Get principal components deviations."""
-        View.__deviations = deviations
+        Array has a row of vertices deltas per component.
+        Key identifies the basis in setup cache, it's not cached without key.
+        """
+        View.__basis = basis
+        View.__basis_key = key
 
     @staticmethod
     def set_mean_face(mean_face):
@@ -140,119 +447,298 @@ class View:
         View.__mean_face = mean_face
 
     @staticmethod
-    def __get_rotation_matrix(coordinates, side_length):
-        """Get rotation matrix from specific point of view and scale."""
-        assert len(coordinates) == 3
-        glLoadIdentity()
-        glOrtho(-side_length, side_length, -side_length, side_length,
-                -4 * side_length, 4 * side_length)
-        x, y, z = coordinates
-        gluLookAt(x, y, z, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0)
-        return array(glGetFloatv(GL_MODELVIEW_MATRIX), dtype='f')
+    def set_shape_engine(get_vertices, update_vertices):
+        """Set functions calculating vertices of Faces.
 
-    def __display(self):
-        """Render the model by existent vertices, colors and triangles."""
-        self.__rotate_model()
-        self.__generate_shadows()
-        self.__generate_model()
+        `get_vertices` calculates array of shape `(N, V, 3)` for the list
+        of coefficients arrays, `update_vertices` adds changes of
+        coefficients with given indices to vertices in place.
+        """
+        View.__get_vertices = staticmethod(get_vertices)
+        View.__update_vertices = staticmethod(update_vertices)
+
+    def render(self, faces=None):
+        """Render Faces right away without waiting for redisplay.
 
-        glutSwapBuffers()
+        Given Faces replace current ones. Single Face is rendered
+        to the viewport, several Faces are rendered to tiles
+        of batch framebuffer.
+        """
+        if faces is not None:
+            self.faces = faces
+        batch = len(self.__faces) > 1
+        framebuffer = (self.__batch_framebuffer if batch
+                       else self.__context.framebuffer)
+        glBindFramebuffer(GL_FRAMEBUFFER, framebuffer)
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+
+        if self.__target is not None:
+            glBindFramebuffer(GL_FRAMEBUFFER, self.__error_framebuffer)
+            glClearColor(0., 0., 0., 0.)
+            glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+            glClearColor(1., 1., 1., 0.)
+
+        updates = self.__get_shape_updates()
+        for tile, face in enumerate(self.__faces):
+            self.__face = face
+            if updates[tile] is not None:
+                self.__update_shape(tile, *updates[tile])
+            self.__rotate_model()
+            self.__generate_shadows()
+
+            glBindFramebuffer(GL_FRAMEBUFFER, framebuffer)
+            row, column = divmod(tile, self.__columns)
+            glViewport(column * self.__width, row * self.__height,
+                       self.__width, self.__height)
+            self.__generate_model()
+            if self.__target is not None:
+                self.__generate_error(row, column)
+
+        # Errors are rendered to their own framebuffer, so images are read
+        # from the viewport one only after it's bound back
+        glBindFramebuffer(GL_FRAMEBUFFER, self.__context.framebuffer)
+        # Batch frames present the first Face, which is in the corner
+        self.__context.swap_buffers(self.__batch_framebuffer if batch
+                                    else None)
+
+    def __display(self):
+        """Render requested Faces and trigger the callback."""
+        self.render()
         if self.__callback is not None:
             self.__callback()
 
+    def __get_shape_updates(self):
+        """Get updates of the shape for Faces in order of tiles.
+
+        Vertices for CPU shape, which should be calculated again,
+        are calculated for all of them at once.
+        """
+        updates = self.__shape_updates.get_updates(
+            [face.coefficients for face in self.__faces])
+        self.__shapes = {}
+        if self.__shape == 'cpu':
+            changed = [tile for tile, update in enumerate(updates)
+                       if update is not None and update[0] is None]
+            if len(changed) > 0:
+                self.__shapes = dict(zip(changed, View.__get_vertices(
+                    [updates[tile][1] for tile in changed])))
+        return updates
+
+    def __update_shape(self, tile, indices, deltas):
+        """Store vertices of the Face in given tile to the shape buffer.
+
+        Changes of coefficients with given indices are added
+        to the last shape, all of them are used if indices are `None`.
+        """
+        if self.__shape == 'cpu':
+            if indices is None:
+                self.__vertices = self.__shapes[tile]
+            else:
+                View.__update_vertices(self.__vertices, indices, deltas)
+            glBindBuffer(GL_ARRAY_BUFFER, self.__shape_buffer)
+            glBufferSubData(GL_ARRAY_BUFFER, 0, self.__vertices.nbytes,
+                            self.__vertices)
+            glBindBuffer(GL_ARRAY_BUFFER, 0)
+            return
+
+        base = self.__shape_buffer
+        if indices is None:
+            base = self.__mean_buffer
+            indices = arange(len(deltas))
+        # Shaders support only components of the loaded basis
+        supported = indices < View.__basis.shape[0]
+        length = self.__get_shape_block_length() // 2
+        shape = zeros(2 * length, dtype='f')
+        shader_indices = shape[:length].view('i')
+        shader_indices[:] = -1
+        shader_indices[:supported.sum()] = indices[supported]
+        # Quantized components are scaled back by coefficients
+        shape[length + indices[supported]] = (
+            deltas[supported] * self.__basis_scales[indices[supported]])
+
+        self.__morph.use_shaders()
+        self.__morph.bind_attribute_buffer(base, 'base_position')
+        self.__morph.update_uniform_buffer(SHAPE_BINDING, shape)
+        glActiveTexture(GL_TEXTURE0)
+        self.__morph.bind_texture(0)
+
+        target = self.__shape_buffers[
+            1 - self.__shape_buffers.index(self.__shape_buffer)]
+        glEnable(GL_RASTERIZER_DISCARD)
+        glBindBufferBase(GL_TRANSFORM_FEEDBACK_BUFFER, 0, target)
+        glBeginTransformFeedback(GL_POINTS)
+        glDrawArrays(GL_POINTS, 0, View.__mean_face.size // 3)
+        glEndTransformFeedback()
+        glBindBufferBase(GL_TRANSFORM_FEEDBACK_BUFFER, 0, 0)
+        glDisable(GL_RASTERIZER_DISCARD)
+        self.__morph.clear()
+
+        self.__shape_buffer = target
+        self.__sh.use_shaders()
+        self.__sh.bind_attribute_buffer(self.__shape_buffer, 'position')
+        self.__sh.clear()
+
     def __rotate_model(self):
-        """Update model rotation matrix."""
-        self.__model_matrix = self.__get_rotation_matrix(
+        """Update rotation matrices of the model and uniform buffer."""
+        self.__model_matrix = get_rotation_matrix(
             self.__face.position_cartesian,
             (1 + self.__face.position[2]) * 0.5)
 
+        light = self.__face.directed_light_cartesian
+        self.__light_matrix = get_rotation_matrix(
+            (light[0], light[1], -light[2]), 2.0)
+
+        # Uniform block `Frame` of shaders
+        frame = concatenate((
+            self.__light_matrix.dot(self.__model_matrix).flatten(),
+            self.__model_matrix.flatten(),
+            self.__face.light_cartesian)).astype('f')
+        self.__sh.update_uniform_buffer(FRAME_BINDING, frame)
+
     def __generate_shadows(self):
         """Generate shadow matrix for rotated model."""
         glEnable(GL_POLYGON_OFFSET_FILL)
         glPolygonOffset(3, 0)
         self.__sh.change_shader(vertex=1, fragment=1)
 
-        light = self.__face.directed_light_cartesian
-        self.__light_matrix = self.__get_rotation_matrix(
-            (light[0], light[1], -light[2]), 2.0)
-
         glDisable(GL_CULL_FACE)
-        self.__prepare_shaders(self.__model_matrix, self.__light_matrix, True)
+        self.__sh.use_shaders()
         self.__sh.bind_fbo()
+        glViewport(0, 0, self.__width, self.__height)
         glClear(GL_DEPTH_BUFFER_BIT)
         glDrawElements(GL_TRIANGLES, View.__triangles.size,
-                       GL_UNSIGNED_SHORT, View.__triangles)
-        glFinish()
-
-        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+                       GL_UNSIGNED_SHORT, None)
         self.__sh.clear()
 
     def __generate_model(self):
         """Generate rotated model with shadows."""
         glEnable(GL_CULL_FACE)
         glCullFace(GL_FRONT)
-        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
         self.__sh.change_shader(vertex=0, fragment=0)
-        self.__prepare_shaders(self.__model_matrix, self.__light_matrix, False)
-        self.__sh.bind_buffer()
         self.__sh.use_shaders()
+        glActiveTexture(GL_TEXTURE1)
+        self.__sh.bind_texture(0)
         glDrawElements(GL_TRIANGLES, View.__triangles.size,
-                       GL_UNSIGNED_SHORT, View.__triangles)
+                       GL_UNSIGNED_SHORT, None)
         self.__sh.clear()
 
-    def __prepare_shaders(self, rotation_matrix=None, light_matrix=None,
-                          depth=True):
-        """Generic shaders preparation method for depth map and final scene."""
-        self.__sh.add_attribute(0, self.__mean_face, 'mean_position')
-        self.__sh.bind_buffer()
-
+    def __convert_pixels(self, colors, alpha, image):
+        """Convert read pixels of the tile to channels of float image."""
+        pixels = image.reshape(self.__height, self.__width, -1)
+        if alpha is None:
+            pixels[:] = colors
+            return
+
+        pixels[:, :, 0] = colors[:, :, 0]
+        if colors.dtype.kind == 'u':
+            pixels[:, :, 0] /= 2 ** (8 * colors.dtype.itemsize) - 1
+        pixels[:, :, 1] = alpha
+        pixels[:, :, 1] /= 255
+
+    def __generate_error(self, row, column):
+        """Render squared errors of rotated model to the errors atlas."""
+        glBindFramebuffer(GL_FRAMEBUFFER, self.__error_framebuffer)
+        glViewport(column * self.__error_tile, row * self.__error_tile,
+                   self.__width, self.__height)
+        glEnable(GL_CULL_FACE)
+        glCullFace(GL_FRONT)
+        self.__sh.change_shader(vertex=0, fragment=2)
         self.__sh.use_shaders()
-
-        self.__sh.bind_uniform_matrix(light_matrix.dot(rotation_matrix),
-                                      'light_matrix')
-        if not depth:
-            self.__sh.bind_uniform_matrix(rotation_matrix, 'rotation_matrix')
-            self.__sh.bind_uniform_vector(self.__face.light_cartesian,
-                                          'light_vector')
-        coefficients_amount = len(self.__face.coefficients)
-        indices = -ones(199, dtype='i')
-        indices[:coefficients_amount] = array(range(coefficients_amount))
-        self.__sh.bind_uniform_ints(indices, 'indices')
-
-        coefficients = zeros(199, dtype='f')
-        coefficients[:coefficients_amount] = self.__face.coefficients
-        self.__sh.bind_uniform_floats(coefficients, 'coefficients')
-
-        glActiveTexture(GL_TEXTURE0)
+        glActiveTexture(GL_TEXTURE1)
         self.__sh.bind_texture(0)
-        if not depth:
-            glActiveTexture(GL_TEXTURE1)
-            self.__sh.bind_texture(1)
+        glActiveTexture(GL_TEXTURE2)
+        glBindTexture(GL_TEXTURE_2D, self.__target_texture)
+        glDrawElements(GL_TRIANGLES, View.__triangles.size,
+                       GL_UNSIGNED_SHORT, None)
+        glBindTexture(GL_TEXTURE_2D, 0)
+        self.__sh.clear()
 
-    def __bind_pca_texture(self):
-        """Bind texture with principal components.
+    def __create_error_atlas(self):
+        """Create target texture and atlas of errors with a tile per Face.
 
-        Needed for shaders to calculate Face model.
+        Sizes of tiles and atlas are powers of two,
+        so that mipmaps average tiles exactly.
         """
-        size = View.__principal_components.size // 3
-        data = View.__principal_components.transpose() * View.__deviations
+        def power_of_two(value):
+            return 2 ** int(ceil(log(value, 2)))
+
+        self.__error_tile = power_of_two(max(self.__width, self.__height))
+        self.__error_columns = power_of_two(self.__columns)
+        self.__error_rows = power_of_two(self.__rows)
+        # PyOpenGL can't size output of two channels, so it's preallocated
+        self.__error_sums = zeros((self.__error_rows, self.__error_columns, 2),
+                                  dtype='f')
+        size = (self.__error_tile * self.__error_columns,
+                self.__error_tile * self.__error_rows)
+
+        self.__target_texture, self.__error_texture = glGenTextures(2)
+        for texture in (self.__target_texture, self.__error_texture):
+            glBindTexture(GL_TEXTURE_2D, texture)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RG32F, size[0], size[1], 0,
+                     GL_RG, GL_FLOAT, None)
+        glBindTexture(GL_TEXTURE_2D, 0)
+
+        self.__error_framebuffer = create_framebuffer(size,
+                                                      self.__error_texture)
+        glBindFramebuffer(GL_FRAMEBUFFER, self.__context.framebuffer)
+
+    def __create_buffer(self, data, usage):
+        """Create buffer of the size of Face vertices."""
+        buffer_id = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, buffer_id)
+        glBufferData(GL_ARRAY_BUFFER, View.__mean_face.nbytes, data, usage)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        return buffer_id
 
-        columns = 2**13
-        rows = ceil(size / columns)
+    @staticmethod
+    def __get_shape_defines():
+        """Get sizes of the basis `morph.vert` is compiled for."""
+        return {
+            'COMPONENTS': View.__basis.shape[0],
+            'VERTICES': View.__mean_face.size // 3,
+            'TEXTURE_COLUMNS': PCA_TEXTURE_COLUMNS
+        }
 
-        padding = [0] * (rows * columns - size) * 3
-        data = concatenate((data.flatten(), padding))
+    @staticmethod
+    def __get_shape_block_length():
+        """Get number of values of `Shape` uniform block.
 
-        self.__sh.create_float_texture(data, (columns, rows), 2, 3)
+        Indices and coefficients are padded to whole vectors.
+        """
+        return 2 * 4 * int(ceil(View.__basis.shape[0] / 4.))
 
-    def __init_display(self):
-        """Initialize the viewport with specified size."""
-        glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGB | GLUT_ALPHA | GLUT_DEPTH)
-        glutInitWindowSize(*self.__size)
+    def __bind_pca_texture(self, basis_format):
+        """Bind texture with principal components.
 
-        glutInitWindowPosition(0, 0)
-        glutInit(sys.argv)
-        glutCreateWindow(b"Morphable face model")
+        Needed for shaders to calculate Face model.
+        """
+        columns = PCA_TEXTURE_COLUMNS
+        key = None
+        if self.__cache is not None and View.__basis_key is not None:
+            key = get_key(View.__basis_key, basis_format, columns)
+            cached = self.__cache.get_arrays(key, ('texture', 'scales'))
+            if cached is not None:
+                self.__basis_scales = cached['scales']
+                rows = cached['texture'].size // (columns * 3)
+                self.__morph.create_float_texture(
+                    cached['texture'], (columns, rows), 2, 3, basis_format)
+                return
+
+        values, self.__basis_scales = quantize_basis(View.__basis,
+                                                     basis_format)
+        size = values.size // 3
+        rows = int(ceil(size / float(columns)))
+
+        data = zeros(rows * columns * 3, dtype=values.dtype)
+        data[:values.size] = values.reshape(-1)
+        if key is not None:
+            self.__cache.put_arrays(key, {'texture': data,
+                                          'scales': self.__basis_scales})
+
+        self.__morph.create_float_texture(data, (columns, rows), 2, 3,
+                                          basis_format)
 
     def __enable_depth_test(self):
         """Enable depth test and faces culling.
@@ -264,3 +750,6 @@ class View:
 
         glEnable(GL_DEPTH_TEST)
         glEnable(GL_STENCIL_TEST)
+
+
+MFM.register_view(View)
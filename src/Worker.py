@@ -0,0 +1,85 @@
+"""Worker thread calculating jobs in order of submission."""
+from threading import Thread, Event
+
+try:
+    from queue import Queue
+except ImportError:  # Python 2
+    from Queue import Queue
+
+
+class Job:
+    """Function call which result is got later."""
+
+    def __init__(self, function, *args):
+        """Create job calling function with given arguments."""
+        self.__function = function
+        self.__args = args
+        self.__result = None
+        self.__error = None
+        self.__done = Event()
+
+    def run(self):
+        """Call the function and keep its result or raised exception."""
+        try:
+            self.__result = self.__function(*self.__args)
+        except Exception as error:
+            self.__error = error
+        finally:
+            self.__done.set()
+
+    @property
+    def done(self):
+        """Check if the job is finished."""
+        return self.__done.is_set()
+
+    def wait(self):
+        """Wait for the job to finish."""
+        self.__done.wait()
+
+    def get(self):
+        """Wait for the job and get its result.
+
+        Exception raised by the function is raised again.
+        """
+        self.wait()
+        if self.__error is not None:
+            raise self.__error
+        return self.__result
+
+
+class Worker:
+    """Thread running submitted jobs one by one.
+
+    NumPy releases GIL for most of array operations,
+    so jobs are calculated while the main thread renders.
+    """
+
+    def __init__(self, size=0):
+        """Start the thread, it doesn't keep application running.
+
+        If `size` is given, submitting waits while that many jobs
+        are queued.
+        """
+        self.__jobs = Queue(size)
+        self.__thread = Thread(target=self.__run)
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    def submit(self, function, *args):
+        """Queue call of the function, `Job` provides its result."""
+        job = Job(function, *args)
+        self.__jobs.put(job)
+        return job
+
+    def close(self):
+        """Finish queued jobs and stop the thread."""
+        self.__jobs.put(None)
+        self.__thread.join()
+
+    def __run(self):
+        """Run jobs until the worker is closed."""
+        while True:
+            job = self.__jobs.get()
+            if job is None:
+                return
+            job.run()
@@ -1,10 +1,53 @@
-from . import MFM
-from .Face import Face
-from .View import View
-from .Model import Model
-from .ModelInput import ModelInput
-from .ShadersHelper import ShadersHelper
-from . import fitter
-
-__all__ = ['MFM', 'Face', 'View', 'Model', 'ModelInput', 'ShadersHelper',
-           'fitter']
+"""Morphable Face Model fitting.
+
+Modules are imported on first access to them or their classes,
+so that commands don't load OpenGL, SciPy or PIL they don't use.
+"""
+import sys
+from importlib import import_module
+from types import ModuleType
+
+# Modules and classes imported on first access,
+# each class from the module of its name
+LAZY_MODULES = ['MFM', 'fitter']
+LAZY_CLASSES = ['Face', 'View', 'CPUView', 'Model', 'ModelInput',
+                'ShadersHelper']
+
+__all__ = ['MFM', 'Face', 'View', 'CPUView', 'Model', 'ModelInput',
+           'ShadersHelper', 'fitter']
+
+
+class LazyPackage(ModuleType):
+    """Package providing classes instead of modules of their names.
+
+    Import of the submodule sets it as attribute of the package,
+    which is replaced by the class then.
+    """
+
+    def __init__(self, module):
+        """Take attributes of the module, which is kept referenced,
+        since Python 2 clears globals of deleted modules."""
+        super(LazyPackage, self).__init__(module.__name__, module.__doc__)
+        self.__dict__.update(module.__dict__)
+        self.__module = module
+
+    def __getattr__(self, name):
+        """Import the module or the class on first access."""
+        if name in LAZY_MODULES:
+            return import_module('.' + name, __name__)
+        if name not in LAZY_CLASSES:
+            raise AttributeError(
+                "module '{}' has no attribute '{}'".format(__name__, name))
+        import_module('.' + name, __name__)
+        return self.__dict__[name]
+
+    def __setattr__(self, name, value):
+        """Store the class of imported submodule of the same name."""
+        if name in LAZY_CLASSES and isinstance(value, ModuleType):
+            value = getattr(value, name)
+        super(LazyPackage, self).__setattr__(name, value)
+
+
+# Instance replaces the module, as class of modules
+# can't be assigned before Python 3.5
+sys.modules[__name__] = LazyPackage(sys.modules[__name__])
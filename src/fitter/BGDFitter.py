@@ -1,5 +1,4 @@
-from PIL import Image
-from numpy import zeros
+from numpy import zeros, where
 
 from src import Face
 from .ModelFitter import ModelFitter
@@ -71,7 +70,7 @@ class BGDFitter(ModelFitter):
             shadows = image
             self.__derivatives[param] = self.get_image_deviation(shadows)
             face = self.__derivative_face(param, self.__dx)
-            self.request_face(face, 'right_derivative')
+            self.request_error(face, 'right_derivative')
         elif 'derivative' in step:
             shadows = image
 
@@ -96,7 +95,7 @@ class BGDFitter(ModelFitter):
                     0.5 * (self.__left_derivatives[param]
                            + self.__right_derivatives[param]))
 
-            self.request_face(face, action)
+            self.request_error(face, action)
 
     def __derivative_face(self, param, dx):
         params = self.__face.as_array
@@ -111,13 +110,9 @@ class BGDFitter(ModelFitter):
         return (y1 - y0) / dx
 
     def __finish(self, shadows):
-        img = shadows
-        img[shadows[:, 3] == 0.] = 1.
-        img = img[::-1]
-        image = Image.new('L', (500, 500))
-        image.putdata((img*255).astype('i'))
-        image.save('img.png'.format(self.__loop))
-        image.close()
+        # Background is white
+        self.save_image('img.png',
+                        where(shadows[:, -1] == 0., 1., shadows[:, 0]))
         if self.__callback is not None:
             self.__callback(self.__face)
         # print('Finished')
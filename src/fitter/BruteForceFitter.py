@@ -63,7 +63,7 @@ class BruteForceFitter(ModelFitter):
         self.__face = self._initial_face
         self.__parameters = self._initial_face.as_array
 
-        self.request_face(self.__face, 'init')
+        self.request_error(self.__face, 'init')
 
         self.__errors = {}
         self.__generate_errors()
@@ -98,7 +98,7 @@ class BruteForceFitter(ModelFitter):
         value = self.__get_value(change_on, self.__indices[change_on])
         self.__parameters[self.__levels[change_on]] = value
         self.__face = Face.from_array(self.__parameters)
-        self.request_face(self.__face, index)
+        self.request_error(self.__face, index)
 
     def __inc_index(self, level=0):
         self.__indices[level] += self.__directions[level]
@@ -126,7 +126,7 @@ class BruteForceFitter(ModelFitter):
             parameters = self._initial_face.as_array
             parameters[self.__levels] = result[-1][0]
             self.__face = Face.from_array(parameters)
-            self.request_face(self.__face, 'finish')
+            self.request_error(self.__face, 'finish')
             return
 
         self.__get_parameter(change_on=change_on)
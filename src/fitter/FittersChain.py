@@ -8,9 +8,9 @@ def parse_fitter(fitter):
     if isinstance(fitter, ModelFitter):
         return fitter
     elif fitter in src.fitter.__all__:
-        return src.fitter.__dict__[fitter]
+        return getattr(src.fitter, fitter)
     elif fitter + 'Fitter' in src.fitter.__all__:
-        return src.fitter.__dict__[fitter + 'Fitter']
+        return getattr(src.fitter, fitter + 'Fitter')
     raise ValueError('{} is not a valid fitter'.format(fitter))
 
 
@@ -29,7 +29,7 @@ class GibbsSamplerFitter(ModelFitter):
         self.__face = self._initial_face
         self.__parameters = self.__face.as_array
 
-        self.request_face(self.__face, 'init')
+        self.request_error(self.__face, 'init')
         self.__get_parameter(0)
 
     def __get_parameter(self, i):
@@ -45,7 +45,7 @@ class GibbsSamplerFitter(ModelFitter):
             self.__values[i] = value
             parameters = self.__parameters.copy()
             parameters[self.__current_step] = value
-            self.request_face(Face.from_array(parameters), i)
+            self.request_error(Face.from_array(parameters), i)
 
     def receive_image(self, image, index=None):
         if index == 'init':
@@ -93,12 +93,12 @@ class GibbsSamplerFitter(ModelFitter):
 
         if self.__current_step + 1 == self._dimensions \
                 and self.__loop + 1 >= self.__max_loops:
-            self.request_face(self.__face)
+            self.request_error(self.__face)
             return
         elif self.__current_step + 1 == self._dimensions:
             self.__current_step = 0
             self.__loop += 1
-            self.request_face(self.__face, 'pre')
+            self.request_error(self.__face, 'pre')
             return
 
-        self.request_face(self.__face, 'pre')
+        self.request_error(self.__face, 'pre')
@@ -1,4 +1,5 @@
-from numpy import array, nonzero, zeros
+from numpy import asarray, zeros, empty, nan, dot
+from numpy import subtract, multiply, not_equal, count_nonzero
 
 from src import Face
 
@@ -13,8 +14,12 @@ class ModelFitter:
         """Initializes fitter for given image.
 
         Fits provided number of dimensions of given model to the image.
+        Array of the image isn't copied, so that errors against it
+        requested by chained Fitters are cached together.
         """
-        self.__image = array(image)
+        self.__image = asarray(image)
+        self.__difference = None
+        self.__covered = None
         self.__model = model
         self.__pcs = dimensions
         self._dimensions = (dimensions
@@ -62,7 +67,39 @@ class ModelFitter:
         request, which provoked this response.
         """
         self.__model.request_image(
-            face, lambda image: self.receive_image(image, label))
+            face, lambda image: self.receive_image(image, label), token=self)
+
+    def request_error(self, face, label=None):
+        """Requests error of rendered face against the image.
+
+        Error is calculated by rendering host, so instead of the image
+        Fitter receives `(error, covered_pixels_count)` with the label.
+        """
+        self.__model.request_error(
+            face, self.__image,
+            lambda error: self.receive_image(error, label), token=self)
+
+    def request_cost(self, face, cost, label=None):
+        """Requests cost of rendered face calculated by given function.
+
+        Function takes the image and Fitter receives its result
+        with the label. It may be called by worker thread of the host.
+        """
+        self.__model.request_cost(
+            face, cost, lambda value: self.receive_image(value, label),
+            token=self)
+
+    def cancel_requests(self):
+        """Drop queued requests of the Fitter.
+
+        Useful when remaining results are not needed anymore,
+        though already rendered ones are still received.
+        """
+        self.__model.cancel(self)
+
+    def save_image(self, filename, image):
+        """Save image got from the host to PNG file."""
+        self.__model.write_image(filename, image)
 
     def receive_image(self, image, index=None):
         """Callback for host on renderer.
@@ -72,9 +109,20 @@ class ModelFitter:
         raise NotImplementedError()
 
     def get_image_deviation(self, image):
-        """Cost function for fitting result."""
-        indices = nonzero(image[:, -1])
-        if len(image.shape) > 1:
-            image = image[:, 0]
-        diff = image - self.__image
-        return (diff[indices] ** 2).mean()
+        """Cost function for fitting result.
+
+        Accepts rendered image or error calculated by rendering host.
+        """
+        if isinstance(image, tuple):
+            return image[0]
+        if self.__difference is None:
+            self.__difference = empty(self.__image.shape, dtype='f')
+            self.__covered = empty(self.__image.shape, dtype=bool)
+        # Scratch arrays are reused, so that no memory is allocated per image
+        not_equal(image[:, -1], 0, out=self.__covered)
+        count = count_nonzero(self.__covered)
+        if count == 0:
+            return nan
+        subtract(image[:, 0], self.__image, out=self.__difference)
+        multiply(self.__difference, self.__covered, out=self.__difference)
+        return dot(self.__difference, self.__difference) / count
@@ -40,22 +40,14 @@ class MonteCarloFitter(ModelFitter):
         self.__differences = []
 
         for parameter in range(self.__steps):
-            self.request_face(self.__generate_face_parameters(), parameter)
+            self.request_cost(self.__generate_face_parameters(),
+                              self.__get_power, parameter)
 
-    def receive_image(self, image, index=None):
-        indices = nonzero(image[:, -1])
-
-        difference = (self.__image - image[:, 0])[indices].flatten()
-        variance = std(difference)**2
-
-        power = - (
-            self.__image.size
-            * ((difference**2).sum() / (2*variance)) / difference.size
-            - 0.5 * self.__image.size * log(2 * pi * variance)
-            )
-        if difference.size == 0 or variance == 0 or isnan(power):
+    def receive_image(self, power, index=None):
+        if power is None:
             # print('Zero Parameters:', self.__parameters[index])
-            self.request_face(self.__generate_face_parameters(), index)
+            self.request_cost(self.__generate_face_parameters(),
+                              self.__get_power, index)
             return
         self.__differences[index] = power
         if None not in self.__differences:
@@ -69,6 +61,25 @@ class MonteCarloFitter(ModelFitter):
         #         self.__get_probabilities(self.__differences), params)]
         #     self.__get_iterations_count(tmp)
 
+    def __get_power(self, image):
+        """Get log likelihood of the image.
+
+        Provides `None` if it can't be calculated for the image.
+        """
+        indices = nonzero(image[:, -1])
+
+        difference = (self.__image - image[:, 0])[indices].flatten()
+        variance = std(difference)**2
+        if difference.size == 0 or variance == 0:
+            return None
+
+        power = - (
+            self.__image.size
+            * ((difference**2).sum() / (2*variance)) / difference.size
+            - 0.5 * self.__image.size * log(2 * pi * variance)
+            )
+        return None if isnan(power) else power
+
     def __calculate_result(self):
         """Get weighted sum of achieved parameters.
 
@@ -49,11 +49,11 @@ class NelderMeadFitter(ModelFitter):
             # self.__parameters[i][:i] = self.__offset
             self.__parameters[i] = initial_parameters.copy()
             self.__parameters[i][:i] += self.__offset
-            self.request_face(Face.from_array(self.__parameters[i]), i)
+            self.request_error(Face.from_array(self.__parameters[i]), i)
         # self.__end = ones(self._dimensions)
         # self.__end = randn(self._dimensions)
         self.__end = initial_parameters + self.__offset
-        self.request_face(Face.from_array(self.__end), self._dimensions)
+        self.request_error(Face.from_array(self.__end), self._dimensions)
 
     def receive_image(self, image, index=None):
         error = self.get_image_deviation(image)
@@ -131,7 +131,7 @@ class NelderMeadFitter(ModelFitter):
         self.calculate_centroid()
         self.__reflection = self.__centroid + self.__alpha * \
             (self.__centroid - self.__end)
-        self.request_face(Face.from_array(self.__reflection))
+        self.request_error(Face.from_array(self.__reflection))
 
     def reflection(self):
         self.__sort_parameters()
@@ -152,7 +152,7 @@ class NelderMeadFitter(ModelFitter):
         self.__step = 'expansion'
         self.__expansion = self.__centroid + self.__gamma * \
             (self.__reflection - self.__centroid)
-        self.request_face(Face.from_array(self.__expansion))
+        self.request_error(Face.from_array(self.__expansion))
 
     def expansion(self):
         if self.expansion_error < self.reflection_error:
@@ -167,7 +167,7 @@ class NelderMeadFitter(ModelFitter):
         self.__step = 'contraction'
         self.__contraction = self.__centroid + self.__rho * \
             (self.__parameters[-1] - self.__centroid)
-        self.request_face(Face.from_array(self.__contraction))
+        self.request_error(Face.from_array(self.__contraction))
 
     def contraction(self):
         if self.contraction_error < self.end_error:
@@ -187,8 +187,8 @@ class NelderMeadFitter(ModelFitter):
         self.end_error = None
 
         for i in range(1, self._dimensions):
-            self.request_face(Face.from_array(self.__parameters[i]), i)
-        self.request_face(Face.from_array(self.__end), self._dimensions)
+            self.request_error(Face.from_array(self.__parameters[i]), i)
+        self.request_error(Face.from_array(self.__end), self._dimensions)
 
     def shrink(self):
         if self.__finished():
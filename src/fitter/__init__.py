@@ -1,12 +1,43 @@
-from .FittersChain import FittersChain
-from .ModelFitter import ModelFitter
-from .NelderMeadFitter import NelderMeadFitter
-from .GibbsSamplerFitter import GibbsSamplerFitter
-from .BruteForceFitter import BruteForceFitter
-from .BGDFitter import BGDFitter
-from .MonteCarloFitter import MonteCarloFitter
+"""Fitters of Face parameters to the image.
+
+Fitter classes are imported on first access,
+`FittersChain.parse_fitter` resolves them by name.
+"""
+import sys
+from importlib import import_module
+from types import ModuleType
 
 __all__ = ['FittersChain', 'ModelFitter',
            'NelderMeadFitter', 'GibbsSamplerFitter',
            'BruteForceFitter', 'BGDFitter',
            'MonteCarloFitter']
+
+
+class LazyFitters(ModuleType):
+    """Package providing classes instead of modules of their names."""
+
+    def __init__(self, module):
+        """Take attributes of the module, which is kept referenced,
+        since Python 2 clears globals of deleted modules."""
+        super(LazyFitters, self).__init__(module.__name__, module.__doc__)
+        self.__dict__.update(module.__dict__)
+        self.__module = module
+
+    def __getattr__(self, name):
+        """Import the class on first access."""
+        if name not in __all__:
+            raise AttributeError(
+                "module '{}' has no attribute '{}'".format(__name__, name))
+        import_module('.' + name, __name__)
+        return self.__dict__[name]
+
+    def __setattr__(self, name, value):
+        """Store the class of imported submodule of the same name."""
+        if name in __all__ and isinstance(value, ModuleType):
+            value = getattr(value, name)
+        super(LazyFitters, self).__setattr__(name, value)
+
+
+# Instance replaces the module, as class of modules
+# can't be assigned before Python 3.5
+sys.modules[__name__] = LazyFitters(sys.modules[__name__])
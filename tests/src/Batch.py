@@ -0,0 +1,46 @@
+from os import remove
+
+from unittest import TestCase
+from scipy.io import savemat
+from numpy import array, zeros, ones
+
+from src import MFM, CPUView, Model
+from src.Batch import fit_target, parse_face
+
+
+DATA_FILE = 'batch.mat'
+FITTERS = [{'fitter': 'BruteForce', 'dimensions': 2, 'steps': [2],
+            'levels': [0], 'offsets': [-0.5], 'scales': [4]}]
+
+
+class BatchTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        side = 246006. * 0.25
+        vertices = array([[-side, -side, 0], [-side, side, 0],
+                          [side, -side, 0], [side, side, 0]], dtype='f')
+        triangles = array([[0, 1, 2], [2, 1, 3]], dtype='uint16')
+
+        savemat(DATA_FILE, {
+            'shapeMU': vertices.reshape((vertices.size, 1)),
+            'shapePC': zeros((vertices.size, 2)),
+            'shapeEV': ones((2, 1)),
+            'tl': triangles + 1
+        })
+        MFM.init(DATA_FILE)
+
+    @classmethod
+    def tearDownClass(cls):
+        remove(DATA_FILE)
+
+    def test_fit_after_failed_fitting(self):
+        model = Model(CPUView((20, 20), 2))
+        face = parse_face({'coefficients': [0., 0.],
+                           'directed_light': (0.2, 0.2, 0.5)})
+        # Target of wrong size fails when errors are calculated
+        with self.assertRaises(Exception):
+            fit_target(model, ones(10, dtype='f'), FITTERS, face)
+        result = fit_target(model, ones(20 * 20, dtype='f'), FITTERS, face)
+        self.assertEqual(result['covered'], 10 * 10)
+        self.assertGreater(result['renders'], 0)
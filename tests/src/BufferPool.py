@@ -0,0 +1,26 @@
+from unittest import TestCase
+
+from src.BufferPool import BufferPool
+
+
+class BufferPoolTest(TestCase):
+
+    def test_preallocated(self):
+        pool = BufferPool((4, 2), 'f', 2)
+        buffer = pool.lease()
+        self.assertEqual(buffer.shape, (4, 2))
+        self.assertEqual(buffer.dtype, 'f')
+        self.assertEqual(pool.allocated, 2)
+
+    def test_released_buffer_is_reused(self):
+        pool = BufferPool((4, 2), 'f', 1)
+        buffer = pool.lease()
+        pool.release(buffer)
+        self.assertIs(pool.lease(), buffer)
+        self.assertEqual(pool.allocated, 1)
+
+    def test_grows_when_empty(self):
+        pool = BufferPool((4, 2), 'f', 1)
+        first, second = pool.lease(), pool.lease()
+        self.assertIsNot(first, second)
+        self.assertEqual(pool.allocated, 2)
@@ -0,0 +1,61 @@
+from unittest import TestCase
+from numpy import array, zeros, ones
+
+from src import CPUView, Face
+
+
+class CPUViewTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        side = 246006. * 0.25
+        vertices = array([[-side, -side, 0], [-side, side, 0],
+                          [side, -side, 0], [side, side, 0]], dtype='f')
+        triangles = array([[0, 1, 2], [2, 1, 3]], dtype='uint16')
+
+        CPUView.set_triangles(triangles.flatten())
+        CPUView.set_shape_engine(
+            lambda coefficients: array([vertices] * len(coefficients)),
+            lambda vertices, indices, deltas: None)
+
+    def setUp(self):
+        self.view = CPUView((20, 20))
+        self.view.face = Face(coefficients=zeros(3),
+                              directed_light=(0.2, 0.2, 0.5))
+
+    def test_image_size(self):
+        self.view.render()
+        self.assertEqual(self.view.get_image().shape, (20 * 20 * 4,))
+
+    def test_coverage(self):
+        self.view.render()
+        image = self.view.get_image().reshape(20, 20, 4)
+        self.assertEqual(image[10, 10, 3], 1.)
+        self.assertEqual(tuple(image[0, 0]), (1., 1., 1., 0.))
+        self.assertEqual(image[:, :, 3].sum(), 10 * 10)
+
+    def test_redraw_callback(self):
+        images = []
+        self.view.redraw(lambda: images.append(self.view.get_image()))
+        self.view.main_loop()
+        self.assertEqual(len(images), 1)
+
+    def test_read_images_order(self):
+        self.view.render()
+        self.view.read_images()
+        self.view.face = Face(coefficients=zeros(3), position=(0, 0, 1.))
+        self.view.render()
+        self.view.read_images()
+        first, = self.view.get_read_images()
+        second, = self.view.get_read_images()
+        self.assertEqual(first[:, 3].sum(), 10 * 10)
+        self.assertLess(second[:, 3].sum(), 10 * 10)
+
+    def test_errors(self):
+        self.view.render()
+        self.view.target = ones(20 * 20)
+        (error, count), = self.view.get_errors()
+        image = self.view.get_image().reshape(-1, 4)
+        covered = image[:, 3] == 1.
+        self.assertEqual(count, 10 * 10)
+        self.assertAlmostEqual(error, ((image[covered, 0] - 1) ** 2).mean())
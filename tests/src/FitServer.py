@@ -0,0 +1,111 @@
+import json
+from base64 import b64encode
+from io import BytesIO
+from os import remove
+from threading import Thread
+from time import sleep
+
+try:
+    from urllib.request import Request, urlopen
+    from urllib.error import HTTPError
+except ImportError:  # Python 2
+    from urllib2 import Request, urlopen, HTTPError
+
+from unittest import TestCase
+from PIL import Image
+from scipy.io import savemat
+from numpy import array, zeros, ones
+
+from src import MFM, CPUView, Model
+from src.Batch import parse_face
+from src.FitServer import FitServer
+
+
+DATA_FILE = 'server.mat'
+SIZE = (20, 20)
+FITTERS = [{'fitter': 'BruteForce', 'dimensions': 2, 'steps': [2],
+            'levels': [0], 'offsets': [-0.5], 'scales': [4]}]
+
+
+def encode_image():
+    """Get base64 encoded PNG image of the viewport size."""
+    output = BytesIO()
+    Image.new('L', SIZE, 255).save(output, 'PNG')
+    return b64encode(output.getvalue()).decode('ascii')
+
+
+class FitServerTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        side = 246006. * 0.25
+        vertices = array([[-side, -side, 0], [-side, side, 0],
+                          [side, -side, 0], [side, side, 0]], dtype='f')
+        triangles = array([[0, 1, 2], [2, 1, 3]], dtype='uint16')
+
+        savemat(DATA_FILE, {
+            'shapeMU': vertices.reshape((vertices.size, 1)),
+            'shapePC': zeros((vertices.size, 2)),
+            'shapeEV': ones((2, 1)),
+            'tl': triangles + 1
+        })
+        MFM.init(DATA_FILE)
+
+    @classmethod
+    def tearDownClass(cls):
+        remove(DATA_FILE)
+
+    def setUp(self):
+        initial_face = parse_face({'coefficients': [0., 0.],
+                                   'directed_light': (0.2, 0.2, 0.5)})
+        self.server = FitServer(Model(CPUView(SIZE, 2)), SIZE, FITTERS,
+                                initial_face, ('127.0.0.1', 0))
+        self.thread = Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.thread.join(5)
+
+    def request(self, path, data=None):
+        """Get status and JSON response of the server."""
+        url = 'http://{}:{}{}'.format(*(self.server.address + (path,)))
+        if data is not None:
+            data = data.encode('utf-8')
+        try:
+            response = urlopen(Request(url, data), timeout=5)
+        except HTTPError as error:
+            response = error
+        return response.getcode(), json.loads(response.read().decode('utf-8'))
+
+    def wait_job(self, job_id):
+        """Get the job when it's finished."""
+        for _ in range(500):
+            _, job = self.request('/jobs/{}'.format(job_id))
+            if job['status'] in ('done', 'failed'):
+                return job
+            sleep(0.01)
+        self.fail('job {} is not finished'.format(job_id))
+
+    def test_job(self):
+        status, response = self.request(
+            '/jobs', json.dumps({'image': encode_image()}))
+        self.assertEqual(status, 202)
+        job = self.wait_job(response['id'])
+        self.assertEqual(job['status'], 'done')
+        self.assertEqual(job['result']['covered'], 10 * 10)
+
+    def test_malformed_request(self):
+        status, response = self.request('/jobs', '{"image": 1')
+        self.assertEqual(status, 400)
+        self.assertIn('error', response)
+
+    def test_failed_job(self):
+        _, response = self.request('/jobs', json.dumps({
+            'image': encode_image(), 'fitters': [{'fitter': 'Unknown'}]}))
+        self.assertEqual(self.wait_job(response['id'])['status'], 'failed')
+
+    def test_shutdown(self):
+        self.server.shutdown()
+        self.thread.join(5)
+        self.assertFalse(self.thread.is_alive())
@@ -0,0 +1,36 @@
+from os import path
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+
+from PIL import Image
+from numpy import array, load
+
+from src.ImageWriter import ImageWriter, to_image
+
+
+class ImageWriterTest(TestCase):
+
+    def setUp(self):
+        self.directory = mkdtemp()
+
+    def tearDown(self):
+        rmtree(self.directory)
+
+    def test_to_image_flips_rows(self):
+        pixels = array([[0., 1.], [1., 1.]], dtype='f')
+        image = to_image(pixels, (1, 2))
+        self.assertEqual(image.mode, 'LA')
+        self.assertEqual(list(image.getdata()), [(255, 255), (0, 255)])
+
+    def test_write(self):
+        writer = ImageWriter()
+        image_filename = path.join(self.directory, 'image.png')
+        array_filename = path.join(self.directory, 'array.npy')
+        writer.write_image(image_filename, array([[.5, 0., 1., 1.]]), (1, 1))
+        writer.write_array(array_filename, array([1., 2.]))
+        writer.close()
+        image = Image.open(image_filename)
+        self.assertEqual(list(image.getdata()), [(128, 0, 255, 255)])
+        image.close()
+        self.assertEqual(load(array_filename).tolist(), [1., 2.])
@@ -0,0 +1,23 @@
+import sys
+from unittest import TestCase
+
+from src.ImportProfiler import ImportProfiler
+
+
+class ImportProfilerTest(TestCase):
+
+    def test_measured_import(self):
+        sys.modules.pop('colorsys', None)
+        profiler = ImportProfiler()
+        profiler.install()
+        try:
+            import colorsys  # noqa: F401
+        finally:
+            profiler.uninstall()
+        own, total = profiler.times['colorsys']
+        self.assertTrue(0 <= own <= total)
+
+    def test_lazy_package(self):
+        import src
+        from src.CPUView import CPUView
+        self.assertIs(src.CPUView, CPUView)
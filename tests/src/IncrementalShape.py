@@ -0,0 +1,43 @@
+from unittest import TestCase
+
+from numpy import array
+
+from src.IncrementalShape import IncrementalShape
+
+
+class IncrementalShapeTest(TestCase):
+
+    def test_first_shape_is_calculated(self):
+        updates = IncrementalShape().get_updates([[1., 2.]])
+        self.assertIsNone(updates[0][0])
+        self.assertEqual(updates[0][1].tolist(), [1., 2.])
+
+    def test_same_shape(self):
+        updates = IncrementalShape().get_updates([[1., 2.], [1., 2., 0.]])
+        self.assertIsNone(updates[1])
+
+    def test_single_coefficient_change(self):
+        updates = IncrementalShape().get_updates([[1., 2.], [1., 3.]])
+        indices, deltas = updates[1]
+        self.assertEqual(indices.tolist(), [1])
+        self.assertEqual(deltas.tolist(), [1.])
+
+    def test_many_changes_recalculate(self):
+        shape = IncrementalShape(max_changes=1)
+        updates = shape.get_updates([[1., 2.], [2., 3.]])
+        self.assertIsNone(updates[1][0])
+
+    def test_periodic_recalculation(self):
+        shape = IncrementalShape(period=2)
+        updates = shape.get_updates([[0.], [1.], [2.], [3.], [4.]])
+        self.assertEqual([update[0] is None for update in updates],
+                         [True, False, False, True, False])
+
+    def test_coefficients_changed_in_place(self):
+        shape = IncrementalShape()
+        coefficients = array([1., 2.], dtype='f')
+        shape.get_updates([coefficients])
+        coefficients[1] = 3.
+        indices, deltas = shape.get_updates([coefficients])[0]
+        self.assertEqual(indices.tolist(), [1])
+        self.assertEqual(deltas.tolist(), [1.])
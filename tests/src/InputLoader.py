@@ -0,0 +1,46 @@
+from os import path
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+
+from PIL import Image
+from numpy import array
+
+from src.InputLoader import InputLoader, load_image, get_input_paths
+
+
+class InputLoaderTest(TestCase):
+
+    def setUp(self):
+        self.directory = mkdtemp()
+        self.paths = []
+        for index in range(3):
+            filename = path.join(self.directory, '{}.png'.format(index))
+            Image.fromarray(array([[0], [255]], dtype='uint8')).save(filename)
+            self.paths.append(filename)
+
+    def tearDown(self):
+        rmtree(self.directory)
+
+    def test_load_image_flips_rows(self):
+        data = load_image(self.paths[0])
+        self.assertEqual(data.dtype, 'f')
+        self.assertEqual(data.tolist(), [1., 0.])
+
+    def test_directory(self):
+        self.assertEqual(get_input_paths(self.directory), self.paths)
+
+    def test_glob(self):
+        self.assertEqual(get_input_paths(path.join(self.directory, '*.png')),
+                         self.paths)
+
+    def test_manifest(self):
+        manifest = path.join(self.directory, 'inputs.txt')
+        with open(manifest, 'w') as f:
+            f.write('2.png\n0.png\n')
+        self.assertEqual(get_input_paths(manifest),
+                         [self.paths[2], self.paths[0]])
+
+    def test_loader_order(self):
+        loader = InputLoader(self.paths, prefetch=1)
+        self.assertEqual([filename for filename, _ in loader], self.paths)
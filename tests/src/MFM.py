@@ -1,4 +1,5 @@
 from os import remove
+from shutil import rmtree
 
 from unittest import TestCase
 from scipy.io import savemat
@@ -8,6 +9,7 @@ from src import MFM, Face
 
 
 DATA_FILE = 'data.mat'
+COMPILED_DIRECTORY = 'data.compiled'
 
 
 class MFMTest(TestCase):
@@ -32,6 +34,41 @@ class MFMTest(TestCase):
     @classmethod
     def tearDownClass(cls):
         remove(DATA_FILE)
+        rmtree(COMPILED_DIRECTORY, ignore_errors=True)
 
     def test_get_face_class(self):
         self.assertIsInstance(MFM.get_face(), Face)
+
+    def test_get_vertices(self):
+        vertices = MFM.get_vertices(zeros(199))
+        self.assertEqual(vertices.shape, (5, 3))
+        self.assertEqual(vertices[3].tolist(), [1, 0, 1])
+
+    def test_get_vertices_batch(self):
+        faces = [Face(coefficients=zeros(count)) for count in (10, 199, 300)]
+        vertices = MFM.get_faces_vertices(faces)
+        self.assertEqual(vertices.shape, (3, 5, 3))
+
+    def test_update_vertices(self):
+        vertices = MFM.get_vertices(zeros(199))
+        MFM.update_vertices(vertices, [0, 250], [1., 1.])
+        self.assertEqual(vertices[3].tolist(), [1, 0, 1])
+
+    def test_compiled_model(self):
+        coefficients = [1.] * 199
+        vertices = MFM.get_vertices(coefficients)
+        MFM.compile_model(DATA_FILE, COMPILED_DIRECTORY)
+        try:
+            MFM.init(COMPILED_DIRECTORY)
+            self.assertEqual(MFM.get_vertices(coefficients).tolist(),
+                             vertices.tolist())
+        finally:
+            MFM.init(DATA_FILE)
+
+    def test_max_components(self):
+        try:
+            MFM.init(DATA_FILE, max_components=10)
+            self.assertEqual(len(MFM.get_face().coefficients), 10)
+            self.assertEqual(MFM.get_vertices(zeros(50)).shape, (5, 3))
+        finally:
+            MFM.init(DATA_FILE)
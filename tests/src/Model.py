@@ -0,0 +1,74 @@
+from os import listdir, remove
+from os.path import join
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from unittest import TestCase
+from scipy.io import savemat
+from numpy import array, zeros, ones
+
+from src import MFM, CPUView, Face, Model
+
+
+DATA_FILE = 'model.mat'
+
+
+class ImagesFitter:
+    """Fitter requesting images of several Faces at once."""
+
+    def __init__(self, model, count):
+        self.model = model
+        self.count = count
+        self.images = 0
+
+    def start(self):
+        for _ in range(self.count):
+            self.model.request_image(Face(coefficients=zeros(2)),
+                                     self.receive_image)
+
+    def receive_image(self, image):
+        self.images += 1
+
+
+class ModelTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        side = 246006. * 0.25
+        vertices = array([[-side, -side, 0], [-side, side, 0],
+                          [side, -side, 0], [side, side, 0]], dtype='f')
+        triangles = array([[0, 1, 2], [2, 1, 3]], dtype='uint16')
+
+        savemat(DATA_FILE, {
+            'shapeMU': vertices.reshape((vertices.size, 1)),
+            'shapePC': zeros((vertices.size, 2)),
+            'shapeEV': ones((2, 1)),
+            'tl': triangles + 1
+        })
+        MFM.init(DATA_FILE)
+
+    @classmethod
+    def tearDownClass(cls):
+        remove(DATA_FILE)
+
+    def setUp(self):
+        self.directory = mkdtemp()
+        self.model = Model(CPUView((20, 20), 1))
+
+    def tearDown(self):
+        rmtree(self.directory)
+
+    def fit_with_snapshots(self, period):
+        fitter = ImagesFitter(self.model, 5)
+        self.model.save_snapshots(join(self.directory, 'frame'), period)
+        self.model.start(fitter, optimize=True)
+        self.assertEqual(fitter.images, 5)
+        return len(listdir(self.directory))
+
+    def test_snapshots(self):
+        self.assertEqual(self.fit_with_snapshots(2), 2)
+        self.assertEqual(self.model.rendered_faces, 5)
+
+    def test_snapshot_of_every_frame(self):
+        self.assertEqual(self.fit_with_snapshots(1), 5)
+        self.assertEqual(self.model.rendered_faces, 5)
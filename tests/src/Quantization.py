@@ -0,0 +1,32 @@
+from unittest import TestCase
+
+from numpy import array, linspace
+
+from src.Quantization import quantize_basis, dequantize_basis
+from src.Quantization import get_vertex_errors
+
+
+class QuantizationTest(TestCase):
+
+    def setUp(self):
+        self.basis = array([linspace(-1, 1, 6), linspace(0, 300, 6)],
+                           dtype='f')
+
+    def test_int16_scaled_by_component(self):
+        values, scales = quantize_basis(self.basis, 'int16')
+        self.assertEqual(values.dtype, 'int16')
+        self.assertEqual(scales.tolist(), [1, 300])
+        self.assertEqual(abs(values).max(axis=1).tolist(), [32767, 32767])
+
+    def test_dequantized_basis(self):
+        for basis_format in ('float32', 'float16', 'int16'):
+            restored = dequantize_basis(*quantize_basis(self.basis,
+                                                        basis_format))
+            self.assertTrue(abs(restored - self.basis).max() < 0.2)
+
+    def test_vertex_errors(self):
+        self.assertEqual(
+            get_vertex_errors(self.basis, 'float32').tolist(), [0, 0])
+        errors = get_vertex_errors(self.basis, 'int16', bound=2.)
+        self.assertEqual(errors.shape, (2,))
+        self.assertTrue(0 < errors.max() < 0.1)
@@ -0,0 +1,38 @@
+from unittest import TestCase
+from numpy import array
+
+from src import Face
+from src.RenderCache import RenderCache
+
+
+class RenderCacheTest(TestCase):
+
+    def setUp(self):
+        self.cache = RenderCache(2)
+        self.target = array([0., 1.])
+        self.face = Face(coefficients=array([1., 2.]))
+
+    def test_miss(self):
+        self.assertIsNone(self.cache.get(self.face, self.target))
+        self.assertEqual(self.cache.misses, 1)
+
+    def test_hit(self):
+        self.cache.put(self.face, self.target, (0.5, 10))
+        same_face = Face(coefficients=array([1., 2. + 1e-9]))
+        self.assertEqual(self.cache.get(same_face, self.target), (0.5, 10))
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_other_target(self):
+        self.cache.put(self.face, self.target, (0.5, 10))
+        self.assertIsNone(self.cache.get(self.face, array([0., 1.])))
+        self.assertIsNone(self.cache.get(self.face))
+
+    def test_least_recently_used_is_dropped(self):
+        faces = [Face(coefficients=array([float(i)])) for i in range(3)]
+        self.cache.put(faces[0], None, 0)
+        self.cache.put(faces[1], None, 1)
+        self.cache.get(faces[0])
+        self.cache.put(faces[2], None, 2)
+        self.assertEqual(len(self.cache), 2)
+        self.assertIsNone(self.cache.get(faces[1]))
+        self.assertEqual(self.cache.get(faces[0]), 0)
@@ -0,0 +1,40 @@
+from unittest import TestCase
+
+from src.RenderLoop import RenderLoop
+
+
+class RenderLoopTest(TestCase):
+
+    def test_loop_exits_when_idle(self):
+        calls = []
+        loop = RenderLoop(lambda: calls.append(None))
+        loop.main_loop()
+        self.assertEqual(len(calls), 0)
+
+    def test_redisplay_from_display(self):
+        calls = []
+        loop = RenderLoop()
+
+        def display():
+            calls.append(None)
+            if len(calls) < 3:
+                loop.post_redisplay()
+
+        loop.display_func(display)
+        loop.post_redisplay()
+        loop.main_loop()
+        self.assertEqual(len(calls), 3)
+
+    def test_leave_main_loop(self):
+        calls = []
+        loop = RenderLoop()
+
+        def display():
+            calls.append(None)
+            loop.post_redisplay()
+            loop.leave_main_loop()
+
+        loop.display_func(display)
+        loop.post_redisplay()
+        loop.main_loop()
+        self.assertEqual(len(calls), 1)
@@ -0,0 +1,89 @@
+from multiprocessing import active_children
+from os import remove
+
+from unittest import TestCase
+from scipy.io import savemat
+from numpy import array, zeros, ones
+
+from src import MFM, CPUView, Face, Model
+from src.RenderPool import FRAMES, RenderPool
+
+
+DATA_FILE = 'pool.mat'
+OPTIONS = {'backend': 'cpu', 'batch_size': 2, 'model': DATA_FILE}
+
+
+def fit(model, request):
+    """Get results of requests made by the function in order."""
+    results = []
+
+    class Fitter:
+        def start(self):
+            request(results.append)
+
+    model.start(Fitter(), optimize=True)
+    return results
+
+
+class RenderPoolTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        side = 246006. * 0.25
+        vertices = array([[-side, -side, 0], [-side, side, 0],
+                          [side, -side, 0], [side, side, 0]], dtype='f')
+        triangles = array([[0, 1, 2], [2, 1, 3]], dtype='uint16')
+
+        savemat(DATA_FILE, {
+            'shapeMU': vertices.reshape((vertices.size, 1)),
+            'shapePC': zeros((vertices.size, 2)),
+            'shapeEV': ones((2, 1)),
+            'tl': triangles + 1
+        })
+        MFM.init(DATA_FILE)
+        cls.pool = RenderPool((20, 20), 2, OPTIONS)
+        # Faces of several frames of the pool, each one is lit differently
+        count = (FRAMES + 1) * cls.pool.batch_size + 1
+        cls.faces = [Face(coefficients=zeros(2),
+                          directed_light=(0.05 * index, 0.2, 0.5))
+                     for index in range(count)]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+        remove(DATA_FILE)
+
+    def test_images_order(self):
+        def request(callback):
+            model.request_images(self.faces, callback)
+
+        for pipeline in (False, True):
+            model = Model(CPUView((20, 20), 2), pipeline)
+            expected, = fit(model, request)
+            model = Model(self.pool, pipeline)
+            images, = fit(model, request)
+            self.assertEqual(len(images), len(self.faces))
+            for image, expected_image in zip(images, expected):
+                self.assertEqual(image.tolist(), expected_image.tolist())
+
+    def test_errors(self):
+        target = ones(20 * 20, dtype='f')
+
+        def request(callback):
+            for face in self.faces:
+                model.request_error(face, target, callback)
+
+        model = Model(CPUView((20, 20), 2))
+        expected = fit(model, request)
+        model = Model(self.pool)
+        errors = fit(model, request)
+        self.assertEqual([count for _, count in errors],
+                         [count for _, count in expected])
+        for (error, _), (expected_error, _) in zip(errors, expected):
+            self.assertAlmostEqual(error, expected_error, places=5)
+
+    def test_close(self):
+        pool = RenderPool((20, 20), 2, OPTIONS)
+        processes = len(active_children())
+        pool.close()
+        self.assertEqual(len(active_children()), processes - 2)
@@ -0,0 +1,38 @@
+from unittest import TestCase
+
+from src.RenderQueue import RenderQueue
+
+
+class RenderQueueTest(TestCase):
+
+    def setUp(self):
+        self.queue = RenderQueue()
+
+    def test_order(self):
+        for request in range(5):
+            self.queue.push(request)
+        self.assertEqual(self.queue.pop_many(3), [0, 1, 2])
+        self.assertEqual(len(self.queue), 2)
+
+    def test_priority(self):
+        self.queue.push('low', -1)
+        self.queue.push('normal')
+        self.queue.push('high', 1)
+        self.assertEqual(self.queue.pop_many(3), ['high', 'normal', 'low'])
+        self.assertEqual(len(self.queue), 0)
+
+    def test_accept(self):
+        for request in [1, 3, 4, 5]:
+            self.queue.push(request)
+        self.assertEqual(self.queue.pop_many(4, lambda x: x % 2 == 1),
+                         [1, 3])
+        self.assertEqual(self.queue.pop_many(4), [4, 5])
+
+    def test_cancel(self):
+        token = object()
+        self.queue.push(1, token=token)
+        self.queue.push(2)
+        self.queue.push(3, 1, token)
+        self.assertEqual(self.queue.cancel(token), 2)
+        self.assertEqual(len(self.queue), 1)
+        self.assertEqual(self.queue.pop_many(2), [2])
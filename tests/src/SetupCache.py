@@ -0,0 +1,35 @@
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+
+from numpy import arange
+
+from src.SetupCache import SetupCache, get_key
+
+
+class SetupCacheTest(TestCase):
+
+    def setUp(self):
+        self.directory = mkdtemp()
+        self.cache = SetupCache(self.directory)
+
+    def tearDown(self):
+        rmtree(self.directory)
+
+    def test_key(self):
+        self.assertEqual(get_key('a', 1), get_key('a', 1))
+        self.assertNotEqual(get_key('a', 1), get_key('a1'))
+
+    def test_program(self):
+        self.assertIsNone(self.cache.get_program('key'))
+        self.cache.put_program('key', 0x8741, b'binary')
+        self.assertEqual(self.cache.get_program('key'), (0x8741, b'binary'))
+
+    def test_arrays(self):
+        self.assertIsNone(self.cache.get_arrays('key', ('texture',)))
+        self.cache.put_arrays('key', {'texture': arange(6, dtype='int16'),
+                                      'scales': arange(2, dtype='f')})
+        arrays = self.cache.get_arrays('key', ('texture', 'scales'))
+        self.assertEqual(arrays['texture'].tolist(), list(range(6)))
+        self.assertEqual(arrays['texture'].dtype, 'int16')
+        self.assertEqual(arrays['scales'].tolist(), [0, 1])
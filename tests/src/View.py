@@ -0,0 +1,67 @@
+from os import environ
+from unittest import TestCase, SkipTest
+
+from numpy import array, zeros, ones
+
+# Headless platform should be chosen before the first import of OpenGL
+environ.setdefault('PYOPENGL_PLATFORM', 'egl')
+environ.setdefault('EGL_PLATFORM', 'surfaceless')
+
+from src import Face  # noqa: E402
+
+
+class ViewTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        from src import View
+
+        side = 246006. * 0.25
+        vertices = array([[-side, -side, 0], [-side, side, 0],
+                          [side, -side, 0], [side, side, 0]], dtype='f')
+        triangles = array([[0, 1, 2], [2, 1, 3]], dtype='uint16')
+
+        View.set_basis(zeros((1, vertices.size), dtype='f'))
+        View.set_mean_face(vertices.flatten())
+        View.set_triangles(triangles.flatten())
+        View.set_shape_engine(
+            lambda coefficients: array([vertices] * len(coefficients)),
+            lambda vertices, indices, deltas: None)
+        try:
+            cls.view = View((20, 20), 'egl', batch_size=2)
+        except Exception as error:
+            raise SkipTest('EGL context is not available: {}'.format(error))
+
+    def setUp(self):
+        self.face = Face(coefficients=zeros(1),
+                         directed_light=(0.2, 0.2, 0.5))
+        self.view.target = None
+
+    def test_coverage(self):
+        self.view.render([self.face])
+        image, = self.view.get_images()
+        self.assertEqual(image.reshape(20, 20, 4)[:, :, 3].sum(), 10 * 10)
+
+    def test_errors(self):
+        self.view.target = ones(20 * 20, dtype='f')
+        self.view.render([self.face])
+        (error, count), = self.view.get_errors()
+        image, = self.view.get_images()
+        covered = image[:, 3] > 0
+        self.assertEqual(count, 10 * 10)
+        self.assertAlmostEqual(
+            error, ((image[covered, 0] - 1) ** 2).mean(), places=5)
+
+    def test_errors_batch(self):
+        self.view.target = ones(20 * 20, dtype='f')
+        self.view.render([self.face, self.face])
+        errors = self.view.get_errors()
+        self.assertEqual([count for _, count in errors], [100, 100])
+
+    def test_image_with_target(self):
+        self.view.render([self.face])
+        image, = self.view.get_images()
+        image = image.copy()
+        self.view.target = ones(20 * 20, dtype='f')
+        self.view.render([self.face])
+        self.assertEqual(self.view.get_images()[0].tolist(), image.tolist())
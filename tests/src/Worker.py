@@ -0,0 +1,33 @@
+from unittest import TestCase
+
+from src.Worker import Worker, Job
+
+
+class WorkerTest(TestCase):
+
+    def setUp(self):
+        self.worker = Worker()
+
+    def tearDown(self):
+        self.worker.close()
+
+    def test_result(self):
+        job = self.worker.submit(lambda x, y: x + y, 1, 2)
+        self.assertEqual(job.get(), 3)
+
+    def test_order(self):
+        calls = []
+        jobs = [self.worker.submit(calls.append, index)
+                for index in range(10)]
+        for job in jobs:
+            job.get()
+        self.assertEqual(calls, list(range(10)))
+
+    def test_error(self):
+        job = self.worker.submit(lambda: 1 / 0)
+        self.assertRaises(ZeroDivisionError, job.get)
+
+    def test_job_run_inline(self):
+        job = Job(len, [1, 2])
+        job.run()
+        self.assertEqual(job.get(), 2)
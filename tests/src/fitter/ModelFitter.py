@@ -1,10 +1,38 @@
 from unittest import TestCase
 from numpy import array
 
+from src import Face
 from src.fitter import ModelFitter
 
 
+class TargetsModel:
+    """Model keeping targets of requested errors."""
+
+    def __init__(self):
+        self.targets = []
+
+    def request_error(self, face, target, callback, priority=0, token=None):
+        self.targets.append(target)
+
+
 class ModelFitterTest(TestCase):
 
     def test_constructor(self):
         self.assertIsInstance(ModelFitter(array([])), ModelFitter)
+
+    def test_deviation_of_error(self):
+        fitter = ModelFitter(array([0., 1.]))
+        self.assertEqual(fitter.get_image_deviation((0.25, 2)), 0.25)
+
+    def test_deviation_of_image(self):
+        fitter = ModelFitter(array([0., 1.]))
+        image = array([[0.5, 0., 0., 1.], [0., 0., 0., 0.]])
+        self.assertEqual(fitter.get_image_deviation(image), 0.25)
+
+    def test_target_is_shared(self):
+        image = array([0., 1.])
+        model = TargetsModel()
+        for _ in range(2):
+            ModelFitter(image, model=model).request_error(Face())
+        self.assertIs(model.targets[0], image)
+        self.assertIs(model.targets[1], image)